@@ -1,531 +1,2490 @@
 import sys
+import os
+# Only the SDK core is imported up front; the service modules for the requested types are loaded by
+# oci_service() when first used, so startup and usage errors do not pay for the whole SDK.
+os.environ.setdefault("OCI_PYTHON_SDK_NO_SERVICE_IMPORTS", "1")
 import oci
 import csv
-import os
+import importlib
+import fnmatch
+import re
 import datetime
+import argparse
+import json
+import multiprocessing
+import queue
+import collections
+import itertools
+import contextlib
+import random
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
+# Default OCI config profile; --profile picks others (several at once for a sharded run).
 profile = "int03"
 
-# -------- Resource Stop Functions --------
+def oci_service(name):
+    """Imports and returns the SDK service module oci.<name> (e.g. "core", "identity") on first use."""
+    return importlib.import_module(f"oci.{name}")
 
-def stop_compute_instances(compute_client, compartment_id):
-    """Stops all RUNNING compute instances."""
+# -------- Console Output --------
+_output_lock = threading.Lock()
+# Per-worker-thread state of the job being run: buffered output lines and the result callback.
+_job_context = threading.local()
+
+def emit(message):
+    """Prints a line, or buffers it while a concurrent job is running so job output is never interleaved."""
+    lines = getattr(_job_context, "lines", None)
+    if lines is not None:
+        lines.append(message)
+        return
+    with _output_lock:
+        print(message)
+
+def is_planning():
+    """True while the running job is a --plan dry run that must not stop anything."""
+    return getattr(_job_context, "planning", False)
+
+def already_handled(resource_id):
+    """True if the running job was told (by --resume) that this resource was already stopped."""
+    return resource_id in getattr(_job_context, "skip_ids", ())
+
+class ResultRecord:
+    """
+    The outcome of one action on one resource (status "success", "failed" or "planned").
+    Slotted: a large run creates one per resource, and a plain dict would cost several times the memory.
+    """
+    __slots__ = ("resource_name", "resource_id", "status", "message", "time")
+
+    def __init__(self, resource_name, resource_id, status, message="", when=None):
+        self.resource_name = resource_name
+        self.resource_id = resource_id
+        self.status = status
+        self.message = message
+        self.time = time.time() if when is None else when
+
+def record_result(record):
+    """Hands a per-resource result record to the running job's callback (e.g. the streaming log), if any."""
+    on_result = getattr(_job_context, "on_result", None)
+    if on_result is not None:
+        on_result(record)
+
+# -------- Paginated Listing --------
+def list_resources(list_call, **list_kwargs):
+    """
+    Yields every resource returned by a paginated list_* call, one page at a time.
+    Follows opc-next-page until the service reports no more pages, so callers can act on
+    each page as soon as it arrives. Handles both plain-list and collection (.items) responses.
+    Inside a job, filters pushed down from --filter (e.g. display_name) are added to the call.
+    """
+    list_kwargs.update(getattr(_job_context, "list_filters", None) or {})
+    page = None
+    while True:
+        if page:
+            list_kwargs["page"] = page
+        response = list_call(**list_kwargs)
+        data = response.data
+        yield from (data if isinstance(data, list) else data.items)
+        page = response.next_page
+        if not page:
+            return
+
+# Wording of the output for each action ("stop" or "start").
+ACTION_TEXT = {
+    "stop": {"doing": "Stopping", "done": "stopped", "left": "left running"},
+    "start": {"doing": "Starting", "done": "started", "left": "left stopped"},
+}
+
+def stop_listed_resources(resources, label, stop_call, name_attr="display_name", action="stop"):
+    """
+    Stops each resource yielded by `resources` as it is listed (or starts it, with action="start").
+    `stop_call` takes a resource OCID; `label` is the human-readable resource kind used in output.
+    When the running job has a bulk stopper, stop calls are handed to it and run concurrently while
+    listing continues; otherwise each one runs inline.
+    Every record carries the epoch time its call finished and is passed to the job's result callback the
+    moment that call finishes (for bulk calls, from the thread that ran it), so the log and checkpoint
+    never wait on a slower call submitted earlier.
+    Resources that fail the running job's --filter are left alone.
+    A listing error ends the walk but keeps whatever was already stopped.
+    """
+    text = ACTION_TEXT[action]
     successes, failures = [], []
+    bulk = getattr(_job_context, "bulk", None)
+    resource_filter = getattr(_job_context, "resource_filter", None)
+    filtered = 0
+    # One event per bulk call, set once its record has been handed on; drained in submission order.
+    pending = collections.deque()
+    # Errors raised while handing on a bulk call's record (e.g. the log can no longer be written);
+    # callbacks cannot raise into this thread, so drain() raises the first one.
+    callback_errors = []
+    on_result = getattr(_job_context, "on_result", None)
+    lock = threading.Lock()
+
+    def collect(resource, name, outcome, when=None):
+        """Turns the outcome of one stop call (None or the exception it raised) into its record."""
+        if outcome is None:
+            record = ResultRecord(name, resource.id, "success", when=when)
+        else:
+            record = ResultRecord(name, resource.id, "failed", f"Failed to {action} {label}: {outcome}", when)
+        with lock:
+            (successes if outcome is None else failures).append(record)
+        if on_result is not None:
+            on_result(record)
+
+    def submit(stopper, key, resource, name):
+        """Hands one stop call to the bulk stopper; its record is collected as soon as the call finishes."""
+        recorded = threading.Event()
+
+        def done(future):
+            when = time.time()
+            try:
+                outcome = future.exception()
+            except BaseException as e:  # cancelled
+                outcome = e
+            try:
+                collect(resource, name, outcome, when)
+            except Exception as e:
+                callback_errors.append(e)
+            finally:
+                recorded.set()
+        stopper.submit(key, stop_call, resource.id).add_done_callback(done)
+        pending.append(recorded)
+
+    def drain(block):
+        """Forgets bulk calls already recorded; with block, first waits until every one of them is."""
+        while pending and (block or pending[0].is_set()):
+            pending.popleft().wait()
+        if callback_errors:
+            raise callback_errors[0]
+
     try:
-        instances = compute_client.list_instances(compartment_id=compartment_id, lifecycle_state="RUNNING").data
+        for resource in resources:
+            if resource_filter and not resource_filter.matches(resource):
+                filtered += 1
+                continue
+            name = getattr(resource, name_attr, None) or getattr(resource, "display_name", "")
+            if already_handled(resource.id):
+                emit(f"  Skipping {label} {name} ({resource.id}), already {text['done']} before resume")
+                continue
+            if is_planning():
+                emit(f"  Would {action} {label} {name} ({resource.id})")
+                record = ResultRecord(name, resource.id, "planned")
+                successes.append(record)
+                record_result(record)
+                continue
+            emit(f"  {text['doing']} {label} {name} ({resource.id}) ...")
+            if bulk is not None:
+                submit(*bulk, resource, name)
+                drain(block=False)
+                continue
+            try:
+                stop_call(resource.id)
+                outcome = None
+            except Exception as e:
+                outcome = e
+            collect(resource, name, outcome)
+        drain(block=True)
     except oci.exceptions.ServiceError as se:
-        failures.append({
-            "resource_name": "", "resource_id": "", "status": "failed",
-            "message": f"[ServiceError {se.status} {se.code}] {se.message}"})
-        return {"success": successes, "failed": failures}
+        drain(block=True)
+        failures.append(ResultRecord("", "", "failed", f"[ServiceError {se.status} {se.code}] {se.message}"))
+        record_result(failures[-1])
     except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Unexpected error: {e}"})
-        return {"success": successes, "failed": failures}
-    for instance in instances:
-        print(f"  Stopping Compute Instance {instance.display_name} ({instance.id}) ...")
-        try:
-            compute_client.instance_action(instance.id, "STOP")
-            successes.append({"resource_name": instance.display_name, "resource_id": instance.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": instance.display_name, "resource_id": instance.id,
-                             "status": "failed", "message": f"Failed to stop Compute Instance: {e}"})
+        drain(block=True)
+        failures.append(ResultRecord("", "", "failed", f"Failed to list {label}s: {e}"))
+        record_result(failures[-1])
+    if filtered:
+        emit(f"  {filtered} {label}(s) {text['left']} by --filter")
     return {"success": successes, "failed": failures}
 
-def stop_autonomous_databases(db_client, compartment_id):
+# -------- Resource Stop Functions --------
+# Each function lists its own candidates unless `resources` is passed in (e.g. from Resource Search).
+
+def stop_compute_instances(compute_client, compartment_id, resources=None):
+    """Stops all RUNNING compute instances."""
+    instances = resources
+    if instances is None:
+        instances = list_resources(compute_client.list_instances, compartment_id=compartment_id, lifecycle_state="RUNNING")
+    return stop_listed_resources(instances, "Compute Instance",
+                                 lambda ocid: compute_client.instance_action(ocid, "STOP"))
+
+def stop_autonomous_databases(db_client, compartment_id, resources=None):
     """Stops all AVAILABLE Autonomous Databases."""
-    successes, failures = [], []
-    try:
-        dbs = db_client.list_autonomous_databases(compartment_id=compartment_id, lifecycle_state="AVAILABLE").data
-    except oci.exceptions.ServiceError as se:
-        failures.append({
-            "resource_name": "", "resource_id": "", "status": "failed",
-            "message": f"[ServiceError {se.status} {se.code}] {se.message}"})
-        return {"success": successes, "failed": failures}
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Unexpected error: {e}"})
-        return {"success": successes, "failed": failures}
-    for db in dbs:
-        print(f"  Stopping Autonomous Database {db.db_name} ({db.id}) ...")
-        try:
-            db_client.stop_autonomous_database(db.id)
-            successes.append({"resource_name": db.db_name, "resource_id": db.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": db.db_name, "resource_id": db.id,
-                             "status": "failed", "message": f"Failed to stop Autonomous Database: {e}"})
-    return {"success": successes, "failed": failures}
+    dbs = resources
+    if dbs is None:
+        dbs = list_resources(db_client.list_autonomous_databases, compartment_id=compartment_id, lifecycle_state="AVAILABLE")
+    return stop_listed_resources(dbs, "Autonomous Database", db_client.stop_autonomous_database, name_attr="db_name")
 
-def stop_generative_ai_endpoints(genai_client, compartment_id):
+def stop_generative_ai_endpoints(genai_client, compartment_id, resources=None):
     """Stops all ACTIVE Generative AI Endpoints."""
-    successes, failures = [], []
-    try:
-        endpoints = genai_client.list_endpoints(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except oci.exceptions.ServiceError as se:
-        failures.append({
-            "resource_name": "", "resource_id": "", "status": "failed",
-            "message": f"[ServiceError {se.status} {se.code}] {se.message}"})
-        return {"success": successes, "failed": failures}
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Unexpected error: {e}"})
-        return {"success": successes, "failed": failures}
-    for ep in endpoints:
-        print(f"  Stopping Generative AI Endpoint {ep.display_name} ({ep.id}) ...")
-        try:
-            genai_client.deactivate_endpoint(ep.id)
-            successes.append({"resource_name": ep.display_name, "resource_id": ep.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": ep.display_name, "resource_id": ep.id,
-                             "status": "failed", "message": f"Failed to deactivate endpoint: {e}"})
-    return {"success": successes, "failed": failures}
+    endpoints = resources
+    if endpoints is None:
+        endpoints = list_resources(genai_client.list_endpoints, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(endpoints, "Generative AI Endpoint", genai_client.deactivate_endpoint)
 
-def stop_visual_builder_instances(vb_client, compartment_id):
+def stop_visual_builder_instances(vb_client, compartment_id, resources=None):
     """Stops all ACTIVE Oracle Visual Builder instances."""
-    successes, failures = [], []
-    try:
-        vbs = vb_client.list_vb_instances(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Visual Builder Instances: {e}"})
-        return {"success": successes, "failed": failures}
-    for vb in vbs:
-        print(f"  Stopping Visual Builder Instance {vb.display_name} ({vb.id}) ...")
-        try:
-            vb_client.stop_vb_instance(vb.id)
-            successes.append({"resource_name": vb.display_name, "resource_id": vb.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": vb.display_name, "resource_id": vb.id,
-                             "status": "failed", "message": f"Failed to stop Visual Builder Instance: {e}"})
-    return {"success": successes, "failed": failures}
+    vbs = resources
+    if vbs is None:
+        vbs = list_resources(vb_client.list_vb_instances, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(vbs, "Visual Builder Instance", vb_client.stop_vb_instance)
 
-def stop_ai_language_endpoints(lang_client, compartment_id):
+def stop_ai_language_endpoints(lang_client, compartment_id, resources=None):
     """Stops all ACTIVE AI Language endpoints."""
-    successes, failures = [], []
-    try:
-        eps = lang_client.list_endpoints(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list AI Language endpoints: {e}"})
-        return {"success": successes, "failed": failures}
-    for ep in eps:
-        print(f"  Stopping AI Language Endpoint {ep.display_name} ({ep.id}) ...")
-        try:
-            lang_client.deactivate_endpoint(ep.id)
-            successes.append({"resource_name": ep.display_name, "resource_id": ep.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": ep.display_name, "resource_id": ep.id,
-                             "status": "failed", "message": f"Failed to stop AI Language Endpoint: {e}"})
-    return {"success": successes, "failed": failures}
+    eps = resources
+    if eps is None:
+        eps = list_resources(lang_client.list_endpoints, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(eps, "AI Language Endpoint", lang_client.deactivate_endpoint)
 
-def stop_analytics_instances(analytics_client, compartment_id):
+def stop_analytics_instances(analytics_client, compartment_id, resources=None):
     """Stops all ACTIVE Oracle Analytics Cloud instances."""
-    successes, failures = [], []
-    try:
-        analytics_instances = analytics_client.list_analytics_instances(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Analytics Cloud instances: {e}"})
-        return {"success": successes, "failed": failures}
-    for inst in analytics_instances:
-        print(f"  Stopping Analytics Instance {inst.name} ({inst.id}) ...")
-        try:
-            analytics_client.stop_analytics_instance(inst.id)
-            successes.append({"resource_name": inst.name, "resource_id": inst.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": inst.name, "resource_id": inst.id,
-                             "status": "failed", "message": f"Failed to stop Analytics Instance: {e}"})
-    return {"success": successes, "failed": failures}
+    analytics_instances = resources
+    if analytics_instances is None:
+        analytics_instances = list_resources(analytics_client.list_analytics_instances,
+                                             compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(analytics_instances, "Analytics Instance", analytics_client.stop_analytics_instance,
+                                 name_attr="name")
 
-def stop_data_science_notebooks(ds_client, compartment_id):
+def stop_data_science_notebooks(ds_client, compartment_id, resources=None):
     """Stops all ACTIVE Oracle Data Science notebook sessions."""
-    successes, failures = [], []
-    try:
-        notebooks = ds_client.list_notebook_sessions(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Data Science notebooks: {e}"})
-        return {"success": successes, "failed": failures}
-    for nb in notebooks:
-        print(f"  Stopping Data Science Notebook Session {nb.display_name} ({nb.id}) ...")
-        try:
-            ds_client.deactivate_notebook_session(nb.id)
-            successes.append({"resource_name": nb.display_name, "resource_id": nb.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": nb.display_name, "resource_id": nb.id,
-                             "status": "failed", "message": f"Failed to stop Data Science Notebook: {e}"})
-    return {"success": successes, "failed": failures}
+    notebooks = resources
+    if notebooks is None:
+        notebooks = list_resources(ds_client.list_notebook_sessions, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(notebooks, "Data Science Notebook Session", ds_client.deactivate_notebook_session)
 
-def stop_ai_data_platform_pipeline_runs(adp_client, compartment_id):
+def stop_ai_data_platform_pipeline_runs(adp_client, compartment_id, resources=None):
     """Stops all ACTIVE AI Data Platform pipeline runs."""
-    successes, failures = [], []
-    try:
-        runs = adp_client.list_pipeline_runs(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list AI Data Platform pipeline runs: {e}"})
-        return {"success": successes, "failed": failures}
-    for run in runs:
-        print(f"  Stopping AI Data Platform Pipeline Run {run.display_name} ({run.id}) ...")
-        try:
-            adp_client.deactivate_pipeline_run(run.id)
-            successes.append({"resource_name": run.display_name, "resource_id": run.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": run.display_name, "resource_id": run.id,
-                             "status": "failed", "message": f"Failed to stop AI Data Platform Pipeline Run: {e}"})
-    return {"success": successes, "failed": failures}
+    runs = resources
+    if runs is None:
+        runs = list_resources(adp_client.list_pipeline_runs, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(runs, "AI Data Platform Pipeline Run", adp_client.deactivate_pipeline_run)
 
-def stop_mysql_db_systems(mysql_client, compartment_id):
+def stop_mysql_db_systems(mysql_client, compartment_id, resources=None):
     """Stops all AVAILABLE MySQL DB Systems."""
-    successes, failures = [], []
-    try:
-        dbs = mysql_client.list_db_systems(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list MySQL DB Systems: {e}"})
-        return {"success": successes, "failed": failures}
-    for db in dbs:
-        print(f"  Stopping MySQL DB System {db.display_name} ({db.id}) ...")
-        try:
-            stop_details = oci.mysql.models.StopDbSystemDetails(shutdown_type="FAST")  # Specify shutdown type!
-            mysql_client.stop_db_system(db.id, stop_details)
-            successes.append({"resource_name": db.display_name, "resource_id": db.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": db.display_name, "resource_id": db.id,
-                             "status": "failed", "message": f"Failed to stop MySQL DB System: {e}"})
-    return {"success": successes, "failed": failures}
+    dbs = resources
+    if dbs is None:
+        dbs = list_resources(mysql_client.list_db_systems, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    stop_details = oci_service("mysql").models.StopDbSystemDetails(shutdown_type="FAST")  # Specify shutdown type!
+    return stop_listed_resources(dbs, "MySQL DB System", lambda ocid: mysql_client.stop_db_system(ocid, stop_details))
 
-def stop_integration_instances(oic_client, compartment_id):
+def stop_integration_instances(oic_client, compartment_id, resources=None):
     """Stops all AVAILABLE Integration Cloud instances."""
-    successes, failures = [], []
-    try:
-        oics = oic_client.list_integration_instances(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Integration Instances: {e}"})
-        return {"success": successes, "failed": failures}
-    for inst in oics:
-        print(f"  Stopping Integration Instance {inst.display_name} ({inst.id}) ...")
-        try:
-            oic_client.stop_integration_instance(inst.id)
-            successes.append({"resource_name": inst.display_name, "resource_id": inst.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": inst.display_name, "resource_id": inst.id,
-                             "status": "failed", "message": f"Failed to stop Integration Instance: {e}"})
-    return {"success": successes, "failed": failures}
+    oics = resources
+    if oics is None:
+        oics = list_resources(oic_client.list_integration_instances, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(oics, "Integration Instance", oic_client.stop_integration_instance)
 
-def stop_big_data_clusters(bds_client, compartment_id):
+def stop_big_data_clusters(bds_client, compartment_id, resources=None):
     """Stops all ACTIVE Big Data clusters."""
-    successes, failures = [], []
-    try:
-        clusters = bds_client.list_bds_instances(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Big Data clusters: {e}"})
-        return {"success": successes, "failed": failures}
-    for c in clusters:
-        print(f"  Stopping Big Data Cluster {c.display_name} ({c.id}) ...")
-        try:
-            details = oci.bds.models.StopBdsInstanceDetails()  # Create details object (may pass config if needed)
-            bds_client.stop_bds_instance(c.id, details)
-            successes.append({"resource_name": c.display_name, "resource_id": c.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": c.display_name, "resource_id": c.id,
-                             "status": "failed", "message": f"Failed to stop Big Data Cluster: {e}"})
-    return {"success": successes, "failed": failures}
+    clusters = resources
+    if clusters is None:
+        clusters = list_resources(bds_client.list_bds_instances, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    details = oci_service("bds").models.StopBdsInstanceDetails()  # Create details object (may pass config if needed)
+    return stop_listed_resources(clusters, "Big Data Cluster", lambda ocid: bds_client.stop_bds_instance(ocid, details))
 
-def stop_oda_instances(oda_client, compartment_id):
+def stop_oda_instances(oda_client, compartment_id, resources=None):
     """Stops all ACTIVE Oracle Digital Assistant Instances."""
-    successes, failures = [], []
-    try:
-        odas = oda_client.list_digital_assistant_instances(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list ODA Instances: {e}"})
-        return {"success": successes, "failed": failures}
-    for oda in odas:
-        print(f"  Stopping ODA Instance {oda.display_name} ({oda.id}) ...")
-        try:
-            oda_client.stop_digital_assistant_instance(oda.id)
-            successes.append({"resource_name": oda.display_name, "resource_id": oda.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": oda.display_name, "resource_id": oda.id,
-                             "status": "failed", "message": f"Failed to stop ODA Instance: {e}"})
-    return {"success": successes, "failed": failures}
+    odas = resources
+    if odas is None:
+        odas = list_resources(oda_client.list_oda_instances, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(odas, "ODA Instance", oda_client.stop_oda_instance)
 
-def stop_data_integration_pipeline_runs(di_client, compartment_id):
+def stop_data_integration_pipeline_runs(di_client, compartment_id, resources=None):
     """Stops all ACTIVE Data Integration pipeline runs."""
-    successes, failures = [], []
-    try:
-        runs = di_client.list_pipeline_runs(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Data Integration pipeline runs: {e}"})
-        return {"success": successes, "failed": failures}
-    for run in runs:
-        print(f"  Stopping Data Integration Pipeline Run {run.display_name} ({run.id}) ...")
-        try:
-            di_client.deactivate_pipeline_run(run.id)
-            successes.append({"resource_name": run.display_name, "resource_id": run.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": run.display_name, "resource_id": run.id,
-                             "status": "failed", "message": f"Failed to stop DI Pipeline Run: {e}"})
-    return {"success": successes, "failed": failures}
+    runs = resources
+    if runs is None:
+        runs = list_resources(di_client.list_pipeline_runs, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(runs, "Data Integration Pipeline Run", di_client.deactivate_pipeline_run)
 
-def stop_network_firewalls(fw_client, compartment_id):
+def stop_network_firewalls(fw_client, compartment_id, resources=None):
     """Stops all ACTIVE Network Firewalls."""
-    successes, failures = [], []
-    try:
-        fws = fw_client.list_network_firewalls(
-            compartment_id=compartment_id, lifecycle_state="ACTIVE"
-        ).data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Network Firewalls: {e}"})
-        return {"success": successes, "failed": failures}
-    for fw in fws.items:  # <-- Corrected: iterate over .items
-        print(f"  Stopping Network Firewall {fw.display_name} ({fw.id}) ...")
-        try:
-            fw_client.stop_network_firewall(fw.id)
-            successes.append({"resource_name": fw.display_name, "resource_id": fw.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": fw.display_name, "resource_id": fw.id,
-                             "status": "failed", "message": f"Failed to stop Network Firewall: {e}"})
-    return {"success": successes, "failed": failures}
+    fws = resources
+    if fws is None:
+        fws = list_resources(fw_client.list_network_firewalls, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(fws, "Network Firewall", fw_client.stop_network_firewall)
 
-def stop_blockchain_platforms(bc_client, compartment_id):
+def stop_blockchain_platforms(bc_client, compartment_id, resources=None):
     """Stops all ACTIVE Blockchain platforms."""
-    successes, failures = [], []
-    try:
-        bps = bc_client.list_blockchain_platforms(
-            compartment_id=compartment_id, lifecycle_state="ACTIVE"
-        ).data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Blockchain Platforms: {e}"})
-        return {"success": successes, "failed": failures}
-    for bp in bps.items:  # <-- corrected iteration
-        print(f"  Stopping Blockchain Platform {bp.display_name} ({bp.id}) ...")
-        try:
-            bc_client.stop_blockchain_platform(bp.id)
-            successes.append({"resource_name": bp.display_name, "resource_id": bp.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": bp.display_name, "resource_id": bp.id,
-                             "status": "failed", "message": f"Failed to stop Blockchain Platform: {e}"})
-    return {"success": successes, "failed": failures}
+    bps = resources
+    if bps is None:
+        bps = list_resources(bc_client.list_blockchain_platforms, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(bps, "Blockchain Platform", bc_client.stop_blockchain_platform)
 
-def stop_opensearch_clusters(os_client, compartment_id):
+def stop_opensearch_clusters(os_client, compartment_id, resources=None):
     """Stops all ACTIVE OpenSearch clusters."""
-    successes, failures = [], []
-    try:
-        clusters = os_client.list_opensearch_clusters(
-            compartment_id=compartment_id, lifecycle_state="ACTIVE"
-        ).data.items  # <-- THIS LINE IS THE FIX!
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list OpenSearch Clusters: {e}"})
-        return {"success": successes, "failed": failures}
-    if not clusters:
-        return {"success": [], "failed": []}
-    for cluster in clusters:
-        print(f"  Stopping OpenSearch Cluster {cluster.display_name} ({cluster.id}) ...")
-        try:
-            os_client.stop_opensearch_cluster(cluster.id)
-            successes.append({"resource_name": cluster.display_name, "resource_id": cluster.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": cluster.display_name, "resource_id": cluster.id,
-                             "status": "failed", "message": f"Failed to stop OpenSearch Cluster: {e}"})
-    return {"success": successes, "failed": failures}
+    clusters = resources
+    if clusters is None:
+        clusters = list_resources(os_client.list_opensearch_clusters, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(clusters, "OpenSearch Cluster", os_client.stop_opensearch_cluster)
 
-def stop_redis_clusters(redis_client, compartment_id):
+def stop_redis_clusters(redis_client, compartment_id, resources=None):
     """Stops all ACTIVE Redis clusters."""
-    successes, failures = [], []
-    try:
-        clusters = redis_client.list_redis_clusters(compartment_id=compartment_id, lifecycle_state="ACTIVE").data
-    except Exception as e:
-        failures.append({"resource_name": "", "resource_id": "", "status": "failed",
-                         "message": f"Failed to list Redis Clusters: {e}"})
-        return {"success": successes, "failed": failures}
-    for c in clusters:
-        print(f"  Stopping Redis Cluster {c.display_name} ({c.id}) ...")
-        try:
-            redis_client.stop_redis_cluster(c.id)
-            successes.append({"resource_name": c.display_name, "resource_id": c.id,
-                              "status": "success", "message": ""})
-        except Exception as e:
-            failures.append({"resource_name": c.display_name, "resource_id": c.id,
-                             "status": "failed", "message": f"Failed to stop Redis Cluster: {e}"})
-    return {"success": successes, "failed": failures}
+    clusters = resources
+    if clusters is None:
+        clusters = list_resources(redis_client.list_redis_clusters, compartment_id=compartment_id, lifecycle_state="ACTIVE")
+    return stop_listed_resources(clusters, "Redis Cluster", redis_client.stop_redis_cluster)
 
-# -------- CSV Reader and Logger --------
-def read_compartments_from_csv(csv_file_path):
-    """Reads a CSV file with OCI compartment OCIDs (one per line), returns a list of OCIDs."""
-    compartment_ocids = []
+# -------- Resource Start Functions --------
+# Counterparts of the stop functions for --start. They never list: `resources` always comes from
+# the log or plan of an earlier stop run, so only what that run stopped is started again.
+# Types whose SDK client has no start or activate call for the resource have none.
+
+def start_listed_resources(resources, label, start_call, name_attr="display_name"):
+    """Starts each of `resources`; same records, filtering, resume and bulk handling as stop_listed_resources."""
+    return stop_listed_resources(resources, label, start_call, name_attr=name_attr, action="start")
+
+def start_compute_instances(compute_client, compartment_id, resources):
+    """Starts the given compute instances."""
+    return start_listed_resources(resources, "Compute Instance", lambda ocid: compute_client.instance_action(ocid, "START"))
+
+def start_autonomous_databases(db_client, compartment_id, resources):
+    """Starts the given Autonomous Databases."""
+    return start_listed_resources(resources, "Autonomous Database", db_client.start_autonomous_database)
+
+def start_visual_builder_instances(vb_client, compartment_id, resources):
+    """Starts the given Oracle Visual Builder instances."""
+    return start_listed_resources(resources, "Visual Builder Instance", vb_client.start_vb_instance)
+
+def start_analytics_instances(analytics_client, compartment_id, resources):
+    """Starts the given Oracle Analytics Cloud instances."""
+    return start_listed_resources(resources, "Analytics Instance", analytics_client.start_analytics_instance)
+
+def start_data_science_notebooks(ds_client, compartment_id, resources):
+    """Activates the given Oracle Data Science notebook sessions."""
+    return start_listed_resources(resources, "Data Science Notebook Session", ds_client.activate_notebook_session)
+
+def start_mysql_db_systems(mysql_client, compartment_id, resources):
+    """Starts the given MySQL DB Systems."""
+    return start_listed_resources(resources, "MySQL DB System", mysql_client.start_db_system)
+
+def start_integration_instances(oic_client, compartment_id, resources):
+    """Starts the given Integration Cloud instances."""
+    return start_listed_resources(resources, "Integration Instance", oic_client.start_integration_instance)
+
+def start_big_data_clusters(bds_client, compartment_id, resources):
+    """Starts the given Big Data clusters."""
+    details = oci_service("bds").models.StartBdsInstanceDetails()
+    return start_listed_resources(resources, "Big Data Cluster", lambda ocid: bds_client.start_bds_instance(ocid, details))
+
+def start_oda_instances(oda_client, compartment_id, resources):
+    """Starts the given Oracle Digital Assistant Instances."""
+    return start_listed_resources(resources, "ODA Instance", oda_client.start_oda_instance)
+
+def start_blockchain_platforms(bc_client, compartment_id, resources):
+    """Starts the given Blockchain platforms."""
+    return start_listed_resources(resources, "Blockchain Platform", bc_client.start_blockchain_platform)
+
+# -------- Resource Type Registry --------
+# client: "<oci service module>.<client class>", resolved only when the type is used.
+# stop:   the stop_* function for the type.
+# get:    client method that fetches one resource by OCID, used to confirm it stopped (--wait).
+# search: (Resource Search type, lifecycle state the stop function targets), or None when Search does not
+#         index the type and candidates always come from per-compartment list calls.
+# name_filter: list call keyword that filters on an exact display name (--filter pushdown), or None.
+# start:  the start_* function for --start, or None when a stopped resource cannot be started again.
+# start_tier: --start order; every tier is started (and with --wait, confirmed) before the next one:
+#         0 databases and data stores, 1 platform services, 2 the compute app tier.
+# Some entries name calls the SDK (checked against oci 2.188) does not have, so their jobs fail with the
+# error in the log: deactivate_endpoint (generative_ai, ai_language), stop_network_firewall,
+# stop_opensearch_cluster, stop_redis_cluster, and every pipeline-run call (list_pipeline_runs,
+# deactivate_pipeline_run, get_pipeline_run) of ai_data_platform and data_integration.
+ResourceType = collections.namedtuple(
+    "ResourceType", ["client", "stop", "get", "search", "name_filter", "start", "start_tier"],
+    defaults=("display_name", None, 1))
+
+RESOURCE_TYPES = {
+    "compute": ResourceType(
+        "core.ComputeClient", stop_compute_instances, "get_instance", ("instance", "RUNNING"),
+        start=start_compute_instances, start_tier=2),
+    "autonomous_database": ResourceType(
+        "database.DatabaseClient", stop_autonomous_databases, "get_autonomous_database",
+        ("autonomousdatabase", "AVAILABLE"), start=start_autonomous_databases, start_tier=0),
+    "generative_ai": ResourceType(
+        "generative_ai.GenerativeAiClient", stop_generative_ai_endpoints, "get_endpoint", None),
+    "visualbuilder": ResourceType(
+        "visual_builder.VbInstanceClient", stop_visual_builder_instances, "get_vb_instance", ("vbinstance", "ACTIVE"),
+        start=start_visual_builder_instances),
+    "ai_language": ResourceType(
+        "ai_language.AIServiceLanguageClient", stop_ai_language_endpoints, "get_endpoint", None),
+    "analytics_cloud": ResourceType(
+        "analytics.AnalyticsClient", stop_analytics_instances, "get_analytics_instance",
+        ("analyticsinstance", "ACTIVE"), "name", start=start_analytics_instances),
+    "data_science": ResourceType(
+        "data_science.DataScienceClient", stop_data_science_notebooks, "get_notebook_session",
+        ("datasciencenotebooksession", "ACTIVE"), start=start_data_science_notebooks),
+    "ai_data_platform": ResourceType(
+        "ai_data_platform.AiDataPlatformClient", stop_ai_data_platform_pipeline_runs, "get_pipeline_run", None, None),
+    "mysql": ResourceType(
+        "mysql.DbSystemClient", stop_mysql_db_systems, "get_db_system", ("mysqldbsystem", "ACTIVE"),
+        start=start_mysql_db_systems, start_tier=0),
+    "integration_cloud": ResourceType(
+        "integration.IntegrationInstanceClient", stop_integration_instances, "get_integration_instance",
+        ("integrationinstance", "ACTIVE"), start=start_integration_instances),
+    "big_data": ResourceType(
+        "bds.BdsClient", stop_big_data_clusters, "get_bds_instance", None,
+        start=start_big_data_clusters, start_tier=0),
+    "oracle_digital_assistant": ResourceType(
+        "oda.OdaClient", stop_oda_instances, "get_oda_instance", ("odainstance", "ACTIVE"),
+        start=start_oda_instances),
+    "data_integration": ResourceType(
+        "data_integration.DataIntegrationClient", stop_data_integration_pipeline_runs, "get_pipeline_run", None,
+        None),
+    "network_firewall": ResourceType(
+        "network_firewall.NetworkFirewallClient", stop_network_firewalls, "get_network_firewall", None),
+    "blockchain_cloud_service": ResourceType(
+        "blockchain.BlockchainPlatformClient", stop_blockchain_platforms, "get_blockchain_platform", None,
+        start=start_blockchain_platforms),
+    "opensearch": ResourceType(
+        "opensearch.OpensearchClusterClient", stop_opensearch_clusters, "get_opensearch_cluster", None),
+    "redis": ResourceType(
+        "redis.RedisClusterClient", stop_redis_clusters, "get_redis_cluster", None),
+}
+
+def get_client_class(resource_type):
+    """Resolves the SDK client class registered for resource_type, importing only its service module."""
+    service, class_name = RESOURCE_TYPES[resource_type].client.split(".")
+    return getattr(oci_service(service), class_name)
+
+def parse_resource_types(value):
+    """Turns "all" or a comma-separated list of resource types into a de-duplicated list."""
+    if value.strip().lower() == "all":
+        return list(RESOURCE_TYPES)
+    resource_types = []
+    for resource_type in value.lower().split(","):
+        resource_type = resource_type.strip()
+        if resource_type not in RESOURCE_TYPES:
+            raise argparse.ArgumentTypeError(f"Resource type '{resource_type}' is not supported.")
+        if resource_type not in resource_types:
+            resource_types.append(resource_type)
+    return resource_types
+
+# -------- Resource Filters --------
+# A filter is a list of clauses that must all hold for a resource to be stopped:
+#   tag:KEY[=VALUES]  freeform tag KEY (or defined tag NAMESPACE.KEY) is set [to one of VALUES]
+#   name=VALUES       display name matches one of VALUES
+#   shape=VALUES      shape matches one of VALUES
+#   age>N[smhdw]      created more (age<: less) than N seconds/minutes/hours/days/weeks ago
+# VALUES is a comma-separated list of glob patterns; a leading "!" negates the clause.
+FILTER_CLAUSE = re.compile(
+    r"^(?P<negate>!?)\s*(?:tag:(?P<key>[^=]+?)\s*(?:=\s*(?P<tag_values>.+))?"
+    r"|(?P<field>name|shape)\s*=\s*(?P<values>.+)"
+    r"|age\s*(?P<op>[<>])\s*(?P<amount>\d+(?:\.\d+)?)(?P<unit>[smhdw]))$")
+FILTER_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+FilterClause = collections.namedtuple("FilterClause", ["kind", "key", "values", "op", "seconds", "negate", "text"])
+
+def parse_filter_clause(value):
+    """Parses one --filter clause (see Resource Filters) into a FilterClause."""
+    match = FILTER_CLAUSE.match(value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(
+            f"Invalid filter '{value}'; expected tag:KEY[=VALUES], name=VALUES, shape=VALUES or age>/<N[smhdw], "
+            f"optionally prefixed with '!'.")
+    negate = bool(match["negate"])
+    if match["key"]:
+        values = match["tag_values"]
+        return FilterClause("tag", match["key"], tuple(v.strip() for v in values.split(",")) if values else (),
+                            None, None, negate, value)
+    if match["field"]:
+        return FilterClause(match["field"], None, tuple(v.strip() for v in match["values"].split(",")),
+                            None, None, negate, value)
+    return FilterClause("age", None, (), match["op"], float(match["amount"]) * FILTER_UNITS[match["unit"]],
+                        negate, value)
+
+def read_filter_file(path):
+    """Reads filter clauses from a file, one per line; blank lines and lines starting with # are ignored."""
+    with open(path) as f:
+        return [parse_filter_clause(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def is_exact(pattern):
+    """True if a filter pattern has no glob wildcards."""
+    return not any(c in pattern for c in "*?[")
+
+class ResourceFilter:
+    """
+    A compiled set of filter clauses, evaluated on every listed resource before it is stopped.
+    Where the API allows, clauses are also pushed down: an exact name into the list call, and
+    exact tags, names and creation age into the Resource Search query.
+    """
+
+    def __init__(self, clauses):
+        self.clauses = list(clauses)
+
+    def __bool__(self):
+        return bool(self.clauses)
+
+    def _clause_matches(self, clause, resource, now):
+        if clause.kind == "tag":
+            if "." in clause.key:
+                namespace, key = clause.key.split(".", 1)
+                value = ((getattr(resource, "defined_tags", None) or {}).get(namespace) or {}).get(key)
+            else:
+                value = (getattr(resource, "freeform_tags", None) or {}).get(clause.key)
+            if value is None:
+                return False
+            return not clause.values or any(fnmatch.fnmatchcase(str(value), v) for v in clause.values)
+        if clause.kind == "age":
+            created = getattr(resource, "time_created", None)
+            if created is None:
+                return False
+            age = now - created.timestamp()
+            return age > clause.seconds if clause.op == ">" else age < clause.seconds
+        if clause.kind == "name":
+            value = getattr(resource, "display_name", None) or getattr(resource, "name", None)
+        else:
+            value = getattr(resource, "shape", None) or getattr(resource, "shape_name", None)
+        return value is not None and any(fnmatch.fnmatchcase(value, v) for v in clause.values)
+
+    def matches(self, resource):
+        """True if the resource satisfies every clause; a clause on a missing attribute does not hold."""
+        now = time.time()
+        return all(self._clause_matches(c, resource, now) != c.negate for c in self.clauses)
+
+    def exact_name(self):
+        """The display name every match must have, if a clause pins it exactly (for list call pushdown)."""
+        for clause in self.clauses:
+            if clause.kind == "name" and not clause.negate and len(clause.values) == 1 and is_exact(clause.values[0]):
+                return clause.values[0]
+        return None
+
+    def searchable(self):
+        """False if a clause needs an attribute Resource Search results do not carry (shape)."""
+        return not any(clause.kind == "shape" for clause in self.clauses)
+
+    def search_conditions(self):
+        """Resource Search query conditions implied by the clauses that can be pushed down."""
+        conditions = []
+        for clause in self.clauses:
+            if clause.negate:
+                continue
+            if clause.kind == "age":
+                cutoff = datetime.datetime.utcfromtimestamp(time.time() - clause.seconds).strftime("%Y-%m-%dT%H:%M:%SZ")
+                conditions.append(f"timeCreated {'<' if clause.op == '>' else '>'} '{cutoff}'")
+            elif clause.kind == "name" and len(clause.values) == 1 and is_exact(clause.values[0]):
+                conditions.append(f"displayName = '{clause.values[0]}'")
+            elif clause.kind == "tag" and len(clause.values) <= 1 and all(is_exact(v) for v in clause.values):
+                if "." in clause.key:
+                    namespace, key = clause.key.split(".", 1)
+                    parts = [f"definedTags.namespace = '{namespace}'", f"definedTags.key = '{key}'"]
+                    prefix = "definedTags"
+                else:
+                    parts = [f"freeformTags.key = '{clause.key}'"]
+                    prefix = "freeformTags"
+                if clause.values:
+                    parts.append(f"{prefix}.value = '{clause.values[0]}'")
+                conditions.append("(" + " && ".join(parts) + ")")
+        return conditions
+
+    def describe(self):
+        """The clauses as given on the command line, for the confirmation prompt."""
+        return " AND ".join(clause.text.strip() for clause in self.clauses)
+
+# -------- Resource Search Discovery --------
+SEARCH_COMPARTMENTS_PER_QUERY = 50
+
+# Tags and creation time are kept so --filter clauses can still be checked on Search results.
+DiscoveredResource = collections.namedtuple(
+    "DiscoveredResource", ["id", "display_name", "compartment_id", "freeform_tags", "defined_tags", "time_created"],
+    defaults=(None, None, None))
+
+def build_search_query(resource_type, compartment_ocids, conditions=()):
+    """
+    Builds a structured Resource Search query for resource_type in the given compartments,
+    adding any extra `conditions` (e.g. pushed down from a ResourceFilter).
+    """
+    search_type, lifecycle_state = RESOURCE_TYPES[resource_type].search
+    compartments = " || ".join(f"compartmentId = '{c}'" for c in compartment_ocids)
+    extra = "".join(f" && {condition}" for condition in conditions)
+    return f"query {search_type} resources where lifecycleState = '{lifecycle_state}'{extra} && ({compartments})"
+
+def search_resources(search_client, resource_type, compartment_ocids, conditions=()):
+    """Yields a DiscoveredResource for every match, querying SEARCH_COMPARTMENTS_PER_QUERY compartments at a time."""
+    for i in range(0, len(compartment_ocids), SEARCH_COMPARTMENTS_PER_QUERY):
+        query = build_search_query(resource_type, compartment_ocids[i:i + SEARCH_COMPARTMENTS_PER_QUERY], conditions)
+        details = oci_service("resource_search").models.StructuredSearchDetails(
+            type="Structured", query=query, matching_context_type="NONE")
+        for summary in list_resources(search_client.search_resources, search_details=details):
+            yield DiscoveredResource(summary.identifier, summary.display_name, sys.intern(summary.compartment_id),
+                                     getattr(summary, "freeform_tags", None), getattr(summary, "defined_tags", None),
+                                     getattr(summary, "time_created", None))
+
+def discover_region(pool, region, resource_type, compartment_ocids, conditions=()):
+    """Runs the Search discovery for one region; returns {compartment_ocid: [DiscoveredResource, ...]}."""
+    found = {}
+    with pool.client(oci_service("resource_search").ResourceSearchClient, region) as search_client:
+        for resource in search_resources(search_client, resource_type, compartment_ocids, conditions):
+            found.setdefault(resource.compartment_id, []).append(resource)
+    return found
+
+# -------- CSV Reader and Streaming Log --------
+def read_compartment_rows(csv_file_path):
+    """
+    Reads a CSV file with OCI compartment OCIDs (one per line), returns a list of (ocid, recursive).
+    An optional second column of "recursive" (or true/yes/1) also selects every compartment below it.
+    """
+    compartment_rows = []
     with open(csv_file_path, 'r', newline='') as csvfile:
         for row in csv.reader(csvfile):
             if row and row[0].strip():
-                compartment_ocids.append(row[0].strip())
-    return compartment_ocids
-
-def write_log_csv(log_file_path, log_rows):
-    """Writes log rows to the specified CSV file (appends if exists, writes header otherwise)."""
-    header = ["timestamp", "region", "compartment_id", "resource_type", "resource_name", "resource_id", "status", "message"]
-    mode = "w" if not os.path.exists(log_file_path) else "a"
-    with open(log_file_path, mode, newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        if mode == "w":
-            writer.writerow(header)
-        writer.writerows(log_rows)
+                recursive = len(row) > 1 and row[1].strip().lower() in ("recursive", "true", "yes", "1")
+                compartment_rows.append((row[0].strip(), recursive))
+    return compartment_rows
+
+def read_compartments_from_csv(csv_file_path):
+    """Reads a CSV file with OCI compartment OCIDs (one per line), returns a list of OCIDs."""
+    return [ocid for ocid, _ in read_compartment_rows(csv_file_path)]
+
+LOG_FIELDS = ["timestamp", "region", "compartment_id", "resource_type", "resource_name", "resource_id", "status",
+              "message", "final_state", "stop_seconds"]
+
+def make_log_row(region, compartment_ocid, resource_type, record, final_state="", stop_seconds=None):
+    """Builds one log row (a dict keyed by LOG_FIELDS) from a per-resource result record."""
+    return {
+        "timestamp": datetime.datetime.utcfromtimestamp(record.time).isoformat(),
+        "region": region,
+        "compartment_id": compartment_ocid,
+        "resource_type": resource_type,
+        "resource_name": record.resource_name,
+        "resource_id": record.resource_id,
+        "status": record.status,
+        "message": record.message,
+        "final_state": final_state,
+        "stop_seconds": "" if stop_seconds is None else f"{stop_seconds:.1f}",
+    }
+
+def read_log_rows(log_path, profile_name=None):
+    """
+    Yields the rows of a CSV or JSONL log or plan (by file extension) as dicts.
+    With `profile_name`, rows of a combined file from a sharded run that belong to another profile are skipped.
+    """
+    with open(log_path, newline="") as logfile:
+        if log_path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in logfile if line.strip())
+        else:
+            rows = csv.DictReader(logfile)
+        for row in rows:
+            if not profile_name or row.get("profile", profile_name) == profile_name:
+                yield row
+
+class LogSink:
+    """
+    Streams log rows to a CSV or JSONL file from any thread.
+    Rows go onto a queue drained by a background writer thread, which writes them in batches,
+    flushes after every batch and fsyncs at most every `fsync_interval` seconds, so a crash
+    loses at most the rows still in flight. Appends to an existing file (CSV header only on a new one).
+    The file is opened here, so a bad path fails before anything is acted on; if the writer thread fails
+    later (e.g. a full disk), the error is raised by the next write() and by close().
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, path, fields=LOG_FIELDS, log_format="csv", batch_size=500, fsync_interval=2.0):
+        self.path = path
+        self.fields = fields
+        self.log_format = log_format
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        self._error = None
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="")
+        if log_format == "csv" and new_file:
+            csv.DictWriter(self._file, fieldnames=fields).writeheader()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, row):
+        """Queues one row (a dict keyed by the sink's fields); raises the writer thread's error if it failed."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put(row)
+
+    def close(self):
+        """Writes everything still queued, fsyncs and stops the writer thread; raises its error if it failed."""
+        self._queue.put(self._CLOSE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        logfile = self._file
+        writer = csv.DictWriter(logfile, fieldnames=self.fields) if self.log_format == "csv" else None
+        last_sync = time.monotonic()
+        closing = False
+        try:
+            while not closing:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is self._CLOSE:
+                    closing = True
+                    batch.pop()
+                for row in batch:
+                    if writer is not None:
+                        writer.writerow(row)
+                    else:
+                        logfile.write(json.dumps(row) + "\n")
+                self.rows_written += len(batch)
+                logfile.flush()
+                if closing or time.monotonic() - last_sync >= self.fsync_interval:
+                    os.fsync(logfile.fileno())
+                    last_sync = time.monotonic()
+        except Exception as e:
+            self._error = e
+        finally:
+            try:
+                logfile.close()
+            except OSError as e:
+                self._error = self._error or e
+
+# -------- Checkpoint / Resume --------
+def load_checkpoint(checkpoint_path):
+    """
+    Reads a checkpoint written by a previous run.
+    Returns (completed units as a set of (region, compartment, resource_type), set of OCIDs already stopped).
+    """
+    done_units, acted = set(), set()
+    with open(checkpoint_path) as checkpoint:
+        for line in checkpoint:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if "done" in entry:
+                done_units.add(tuple(entry["done"]))
+            elif "acted" in entry:
+                acted.add(entry["acted"])
+    return done_units, acted
+
+def unit_completed(result):
+    """A unit is complete when nothing in it failed; otherwise it is redone on resume."""
+    return not result["failed"]
+
+def unit_listed(result):
+    """True unless listing the unit failed (a failure not tied to any resource)."""
+    return all(f.resource_id for f in result["failed"])
+
+# -------- Tenancy Cache --------
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "oci_stop_resources")
+
+class TenancyCache:
+    """
+    On-disk TTL cache of a tenancy's region subscriptions and compartment tree, one JSON file per profile.
+    Each section has its own timestamp and is refetched only when it is older than the TTL (or when
+    the cache is invalidated), so a stale compartment tree does not force a region lookup and vice versa.
+    The compartment tree comes from a single paginated list_compartments(compartment_id_in_subtree=True).
+    An expired tree is refreshed incrementally: only the compartments created since the newest one in the
+    cache are listed (newest first, stopping at the first known one). Moved and deleted compartments are
+    only picked up by a full refetch, run when the last one is `full_refresh_ttls` TTLs old; a deleted
+    compartment left in the tree meanwhile is empty, since OCI only deletes empty compartments.
+    """
+
+    full_refresh_ttls = 7
+
+    def __init__(self, path, tenancy_id, ttl_seconds, invalidate=False):
+        self.path = path
+        self.tenancy_id = tenancy_id
+        self.ttl_seconds = ttl_seconds
+        self._data = {}
+        if not invalidate and os.path.exists(path):
+            try:
+                with open(path) as cachefile:
+                    self._data = json.load(cachefile)
+            except ValueError:
+                self._data = {}
+        if self._data.get("tenancy") != tenancy_id:
+            self._data = {"tenancy": tenancy_id}
+        self._children = None
+
+    def _fresh(self, section):
+        entry = self._data.get(section)
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def _store(self, section, value, **extra):
+        self._data[section] = dict(extra, fetched_at=time.time(), data=value)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"  # processes of a sharded run share the file
+        with open(tmp_path, "w") as cachefile:
+            json.dump(self._data, cachefile)
+        os.replace(tmp_path, self.path)
+
+    def regions(self, identity):
+        """Returns the subscribed region names, from the cache while it is fresh."""
+        if not self._fresh("regions"):
+            regions = [r.region_name for r in identity.list_region_subscriptions(self.tenancy_id).data]
+            self._store("regions", regions)
+        return self._data["regions"]["data"]
+
+    def compartment_children(self, identity):
+        """Returns {parent OCID: [ACTIVE child OCIDs]} for the whole tenancy, from the cache while it is fresh."""
+        if not self._fresh("compartments"):
+            entry = self._data.get("compartments")
+            compartments = list_resources(identity.list_compartments, compartment_id=self.tenancy_id,
+                                          compartment_id_in_subtree=True, access_level="ANY",
+                                          lifecycle_state="ACTIVE", sort_by="TIMECREATED", sort_order="DESC")
+            if (entry is None or not entry.get("newest")
+                    or time.time() - entry.get("full_at", 0) >= self.full_refresh_ttls * self.ttl_seconds):
+                rows, full_at, newest = [], time.time(), None
+            else:
+                rows, full_at = entry["data"], entry["full_at"]
+                newest = datetime.datetime.fromisoformat(entry["newest"])
+                compartments = itertools.takewhile(lambda c, since=newest: c.time_created >= since, compartments)
+            known = {ocid for ocid, _ in rows}
+            for c in compartments:
+                if c.time_created is not None and (newest is None or c.time_created > newest):
+                    newest = c.time_created
+                if c.id not in known:
+                    rows.append([c.id, c.compartment_id])
+            self._store("compartments", rows, full_at=full_at, newest=newest.isoformat() if newest else None)
+            self._children = None
+        if self._children is None:
+            self._children = {}
+            for ocid, parent in self._data["compartments"]["data"]:
+                self._children.setdefault(parent, []).append(ocid)
+        return self._children
+
+    def expand(self, identity, compartment_rows):
+        """Expands (ocid, recursive) rows into a de-duplicated OCID list, adding every descendant of recursive rows."""
+        compartment_ocids = {}
+        children = self.compartment_children(identity) if any(r for _, r in compartment_rows) else {}
+        for ocid, recursive in compartment_rows:
+            stack = [ocid]
+            while stack:
+                current = stack.pop()
+                if current in compartment_ocids:
+                    continue
+                compartment_ocids[current] = None
+                if recursive:
+                    stack.extend(reversed(children.get(current, [])))
+        return list(compartment_ocids)
+
+# -------- Region Affinity Index --------
+class AffinityIndex:
+    """
+    Remembers which (region, compartment, resource_type) combinations have had resources to stop,
+    one JSON file per profile next to the tenancy cache.
+    With pruning enabled, list-mode runs only visit combinations seen within `expiry_seconds`, except
+    that a full sweep of every combination is run for a type whenever its last one is older than
+    `sweep_seconds`, so resources showing up in new places are still found.
+    """
+
+    def __init__(self, path, tenancy_id, sweep_seconds, expiry_seconds):
+        self.path = path
+        self.sweep_seconds = sweep_seconds
+        self.expiry_seconds = expiry_seconds
+        data = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as indexfile:
+                    data = json.load(indexfile)
+            except ValueError:
+                data = {}
+        if data.get("tenancy") != tenancy_id:
+            data = {"tenancy": tenancy_id}
+        self._data = data
+        self._seen = data.setdefault("seen", {})
+        self._swept = data.setdefault("swept", {})
+
+    def record(self, region, compartment_ocid, resource_type, when=None):
+        """Notes that the combination had at least one resource at `when` (epoch seconds, default now)."""
+        regions = self._seen.setdefault(f"{resource_type}|{compartment_ocid}", {})
+        regions[region] = max(regions.get(region, 0), when or time.time())
+
+    def seed_from_log(self, log_path, profile_name=None):
+        """Records every combination with a resource in a previous run's CSV or JSONL log (rows of `profile_name`)."""
+        for row in read_log_rows(log_path, profile_name):
+            if row.get("resource_id"):
+                when = datetime.datetime.fromisoformat(row["timestamp"]).replace(
+                    tzinfo=datetime.timezone.utc).timestamp()
+                self.record(row["region"], row["compartment_id"], row["resource_type"], when)
+
+    def sweep_due(self, resource_type):
+        """True when resource_type has not had a full sweep within `sweep_seconds`."""
+        return time.time() - self._swept.get(resource_type, 0) >= self.sweep_seconds
+
+    def keep(self, job):
+        """True if the job should run: its type is due a full sweep, or the combination was seen recently."""
+        region, compartment_ocid, resource_type = job
+        if self.sweep_due(resource_type):
+            return True
+        last_seen = self._seen.get(f"{resource_type}|{compartment_ocid}", {}).get(region, 0)
+        return time.time() - last_seen < self.expiry_seconds
+
+    def mark_swept(self, resource_type):
+        """Records that every combination of resource_type was just visited."""
+        self._swept[resource_type] = time.time()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as indexfile:
+            json.dump(self._data, indexfile)
+        os.replace(tmp_path, self.path)
+
+# -------- Plan Files --------
+PLAN_FIELDS = ["region", "compartment_id", "resource_type", "resource_id", "resource_name"]
+
+def make_plan_row(region, compartment_ocid, resource_type, record):
+    """Builds one plan row (a dict keyed by PLAN_FIELDS) from a planned result record."""
+    return {"region": region, "compartment_id": compartment_ocid, "resource_type": resource_type,
+            "resource_id": record.resource_id, "resource_name": record.resource_name}
+
+def add_plan_row(plan, row):
+    """
+    Adds one plan or log row to `plan`. Region, compartment and type repeat on every row, so they are
+    interned: all the rows of a job share one copy of each string.
+    """
+    job = (sys.intern(row["region"]), sys.intern(row["compartment_id"]), sys.intern(row["resource_type"]))
+    plan.setdefault(job, []).append(DiscoveredResource(row["resource_id"], row["resource_name"], job[1]))
+
+def load_plan(plan_path, profile_name=None):
+    """
+    Reads a plan file (the rows of `profile_name`, see read_log_rows);
+    returns {(region, compartment, resource_type): [DiscoveredResource, ...]} in file order.
+    """
+    plan = {}
+    for row in read_log_rows(plan_path, profile_name):
+        if row["resource_type"] not in RESOURCE_TYPES:
+            raise ValueError(f"Resource type '{row['resource_type']}' in {plan_path} is not supported.")
+        add_plan_row(plan, row)
+    return plan
+
+def has_profile_column(path):
+    """True when a log or plan file has a profile column, i.e. it is the combined file of a sharded run."""
+    for row in read_log_rows(path):
+        return "profile" in row
+    return False
+
+def load_restart_targets(path, profile_name=None):
+    """
+    Reads the resources to start again from an earlier stop run's CSV or JSONL log (the rows whose stop
+    request was accepted) or from a plan file (the rows of `profile_name`); returns them in the same shape
+    as load_plan.
+    """
+    plan, seen = {}, set()
+    for row in read_log_rows(path, profile_name):
+        if not row.get("resource_id") or row.get("status", "success") != "success" or row["resource_id"] in seen:
+            continue
+        if row["resource_type"] not in RESOURCE_TYPES:
+            raise ValueError(f"Resource type '{row['resource_type']}' in {path} is not supported.")
+        seen.add(row["resource_id"])
+        add_plan_row(plan, row)
+    return plan
+
+def parse_start_tier(value):
+    """Parses a --start-tier TYPE=N override into (type, N)."""
+    resource_type, _, tier = value.partition("=")
+    resource_type = resource_type.strip().lower()
+    if resource_type not in RESOURCE_TYPES:
+        raise argparse.ArgumentTypeError(f"Resource type '{resource_type}' is not supported.")
+    try:
+        return resource_type, int(tier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected TYPE=N with an integer N, got '{value}'")
+
+def parse_profiles(value):
+    """Parses a --profile value: one or a comma-separated list of OCI config profile names."""
+    profiles = [name.strip() for name in value.split(",") if name.strip()]
+    if not profiles:
+        raise argparse.ArgumentTypeError("expected a profile name")
+    return profiles
+
+def parse_region_shard(value):
+    """Parses a --region-shard K/N value into (K, N) with 1 <= K <= N."""
+    try:
+        shard, shards = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected K/N, got '{value}'")
+    if not 1 <= shard <= shards:
+        raise argparse.ArgumentTypeError(f"Expected 1 <= K <= N, got '{value}'")
+    return shard, shards
+
+def plan_dimensions(plan):
+    """Returns the regions, compartments and resource types a plan touches, each in first-seen order."""
+    regions, compartment_ocids, resource_types = {}, {}, {}
+    for region, compartment_ocid, resource_type in plan:
+        regions[region] = compartment_ocids[compartment_ocid] = resource_types[resource_type] = None
+    return list(regions), list(compartment_ocids), list(resource_types)
+
+# -------- Rate Limiting and Retry --------
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+def is_throttled(error):
+    """True for a 429 TooManyRequests from the service."""
+    return isinstance(error, oci.exceptions.ServiceError) and error.status == 429
+
+def is_retryable(error):
+    """True for throttling, transient 5xx responses and connection-level failures."""
+    if isinstance(error, oci.exceptions.ServiceError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (oci.exceptions.RequestException, oci.exceptions.ConnectTimeout))
+
+class TokenBucket:
+    """
+    Token bucket holding up to one second's worth of requests at the current rate,
+    and never less than one request so rates below 1/s still let calls through.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = max(rate, 1.0)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Takes a token if one is available; otherwise returns the seconds until the next one."""
+        now = time.monotonic()
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class AdaptiveRateLimiter:
+    """
+    Shared per-(region, service) token buckets with jittered exponential backoff.
+    A throttled call halves that key's rate; each success adds a little back (AIMD),
+    so concurrent jobs settle just under what the control plane accepts.
+    """
+
+    def __init__(self, rate=10.0, min_rate=0.5, max_rate=50.0, max_retries=5, base_delay=0.5, max_delay=30.0):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+        self.give_ups = 0
+        self.wait_seconds = 0.0
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.initial_rate)
+        return bucket
+
+    def _sleep(self, seconds):
+        with self._lock:
+            self.wait_seconds += seconds
+        time.sleep(seconds)
+
+    def acquire(self, key):
+        """Blocks until key's bucket has a token."""
+        while True:
+            with self._lock:
+                delay = self._bucket(key).take()
+            if not delay:
+                return
+            self._sleep(delay)
+
+    def call(self, key, func, *args, **kwargs):
+        """Calls func under key's rate limit, retrying throttled and transient failures with backoff."""
+        attempt = 0
+        while True:
+            self.acquire(key)
+            with self._lock:
+                self.calls += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                with self._lock:
+                    bucket = self._bucket(key)
+                    if is_throttled(e):
+                        self.throttles += 1
+                        bucket.rate = max(self.min_rate, bucket.rate / 2)
+                        bucket.tokens = min(bucket.tokens, 0)
+                    if attempt >= self.max_retries:
+                        self.give_ups += 1
+                        raise
+                    self.retries += 1
+                attempt += 1
+                self._sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                continue
+            with self._lock:
+                bucket = self._bucket(key)
+                bucket.rate = min(self.max_rate, bucket.rate + 0.1)
+            return result
+
+    def report(self):
+        """Returns a one-line summary of the throttling counters."""
+        return (f"Rate limiter: {self.calls} calls, {self.throttles} throttled, {self.retries} retries, "
+                f"{self.wait_seconds:.2f}s waiting, {self.give_ups} gave up")
+
+class RateLimitedClient:
+    """
+    Wraps an SDK client so every public method call goes through the rate limiter under (region, service).
+    With metrics, every attempt (including retries) is timed and recorded under (service, operation, region).
+    """
+
+    def __init__(self, client, limiter, key, metrics=None):
+        self._client = client
+        self._limiter = limiter
+        self._key = key
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            func = attr if self._metrics is None else self._metrics.timed(self._key, name, attr)
+            return self._limiter.call(self._key, func, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+# -------- Call Metrics --------
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def error_class(error):
+    """Short label for a failed call: "<status> <code>" for service errors, else the exception class name."""
+    if isinstance(error, oci.exceptions.ServiceError):
+        return f"{error.status} {error.code}"
+    return type(error).__name__
+
+class OperationStats:
+    """Latency histogram, error classes and retries of one (service, operation, region)."""
+
+    def __init__(self):
+        self.count = 0
+        self.retries = 0
+        self.seconds = 0.0
+        self.min_seconds = None
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.errors = collections.Counter()
+
+    def observe(self, seconds, error=None, retry=False):
+        self.count += 1
+        self.retries += retry
+        self.seconds += seconds
+        self.min_seconds = seconds if self.min_seconds is None else min(self.min_seconds, seconds)
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound),
+                          len(LATENCY_BUCKETS))] += 1
+        if error is not None:
+            self.errors[error_class(error)] += 1
+
+    def quantile(self, q):
+        """Estimates the q-quantile as the upper bound of the bucket it falls in (max for the +Inf bucket)."""
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(LATENCY_BUCKETS[i], self.max_seconds) if i < len(LATENCY_BUCKETS) else self.max_seconds
+        return 0.0
+
+class CallMetrics:
+    """
+    Collects per-attempt SDK call timings keyed on (service, operation, region).
+    Exported at the end of a run as a JSON report and, optionally, Prometheus text format.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def observe(self, service, operation, region, seconds, error=None, retry=False):
+        """Records one attempt of an SDK call."""
+        key = (service, operation, region)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = OperationStats()
+            stats.observe(seconds, error, retry)
+
+    def timed(self, key, operation, func):
+        """
+        Wraps func, a method of the client registered under key = (region, service), for one logical
+        call: every attempt is recorded and attempts after the first count as retries.
+        """
+        region, service = key
+        attempts = []
+
+        def attempt(*args, **kwargs):
+            retry = bool(attempts)
+            attempts.append(None)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.observe(service, operation, region, time.perf_counter() - started, e, retry)
+                raise
+            self.observe(service, operation, region, time.perf_counter() - started, None, retry)
+            return result
+        return attempt
+
+    def reset(self):
+        """Starts a new report period (each daemon run reports only its own calls)."""
+        with self._lock:
+            self.started = time.time()
+            self._stats = {}
+
+    def report(self, **run):
+        """Returns the JSON-ready report; keyword arguments are added to its "run" section."""
+        with self._lock:
+            items = sorted(self._stats.items())
+        calls = []
+        for (service, operation, region), stats in items:
+            bounds = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+            calls.append({
+                "service": service, "operation": operation, "region": region,
+                "count": stats.count, "retries": stats.retries, "errors": dict(stats.errors),
+                "seconds_total": round(stats.seconds, 6), "seconds_min": round(stats.min_seconds or 0.0, 6),
+                "seconds_max": round(stats.max_seconds, 6),
+                "p50": round(stats.quantile(0.5), 6), "p90": round(stats.quantile(0.9), 6),
+                "p99": round(stats.quantile(0.99), 6),
+                "buckets": dict(zip(bounds, stats.buckets)),
+            })
+        run = dict(run, started=datetime.datetime.utcfromtimestamp(self.started).isoformat() + "Z",
+                   wall_seconds=round(time.time() - self.started, 3))
+        return {"run": run, "calls": calls}
+
+    def prometheus(self, report):
+        """
+        Renders a report() in Prometheus text exposition format.
+        Calls carrying a "profile" (the combined report of a sharded run) get a profile label.
+        """
+        lines = [
+            "# HELP oci_stop_call_duration_seconds Latency of SDK call attempts.",
+            "# TYPE oci_stop_call_duration_seconds histogram",
+        ]
+        errors, retries = [], []
+        for call in report["calls"]:
+            labels = f'service="{call["service"]}",operation="{call["operation"]}",region="{call["region"]}"'
+            if "profile" in call:
+                labels = f'profile="{call["profile"]}",{labels}'
+            cumulative = 0
+            for bound, n in call["buckets"].items():
+                cumulative += n
+                lines.append(f'oci_stop_call_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"oci_stop_call_duration_seconds_sum{{{labels}}} {call['seconds_total']}")
+            lines.append(f"oci_stop_call_duration_seconds_count{{{labels}}} {call['count']}")
+            retries.append(f"oci_stop_call_retries_total{{{labels}}} {call['retries']}")
+            for error, n in call["errors"].items():
+                errors.append(f'oci_stop_call_errors_total{{{labels},error="{error}"}} {n}')
+        lines += ["# HELP oci_stop_call_errors_total Failed SDK call attempts by error class.",
+                  "# TYPE oci_stop_call_errors_total counter"] + errors
+        lines += ["# HELP oci_stop_call_retries_total SDK call attempts that were retries.",
+                  "# TYPE oci_stop_call_retries_total counter"] + retries
+        for name, value in report["run"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines += [f"# TYPE oci_stop_run_{name} gauge", f"oci_stop_run_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+# -------- Client Pool --------
+def build_signer(config):
+    """Builds the request signer once so every pooled client shares it (and its loaded private key)."""
+    if oci.util.AUTHENTICATION_TYPE_FIELD_NAME in config:
+        return oci.util.get_signer_from_authentication_type(config)
+    return oci.signer.Signer(
+        tenancy=config["tenancy"],
+        user=config["user"],
+        fingerprint=config["fingerprint"],
+        private_key_file_location=config.get("key_file"),
+        pass_phrase=oci.config.get_config_value_or_default(config, "pass_phrase"),
+        private_key_content=config.get("key_content"))
+
+class ClientPool:
+    """
+    Hands out SDK clients keyed on (client class, region).
+    A client is only ever used by one job at a time; once released it goes back on the idle list
+    for its key, so later compartments in the same region reuse its signer, requests session
+    and kept-alive TLS connections instead of building new ones.
+    With a limiter, clients are handed out wrapped in RateLimitedClient, which also feeds `metrics`.
+    """
+
+    def __init__(self, config, limiter=None, metrics=None):
+        self.config = config
+        self.signer = build_signer(config)
+        self.limiter = limiter
+        self.metrics = metrics
+        self._idle = {}
+        self._clients = []
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+        self.build_seconds = 0.0
+
+    @contextlib.contextmanager
+    def client(self, client_class, region):
+        """Context manager yielding an exclusive client for (client_class, region)."""
+        key = (client_class, region)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            client = idle.pop() if idle else None
+            if client is not None:
+                self.reused += 1
+        if client is None:
+            started = time.perf_counter()
+            if self.limiter is None:
+                client = client_class(dict(self.config, region=region), signer=self.signer)
+            else:
+                # Retries are handled by the limiter; the SDK's own retries would hide throttling from it.
+                client = RateLimitedClient(
+                    client_class(dict(self.config, region=region), signer=self.signer,
+                                 retry_strategy=oci.retry.NoneRetryStrategy()),
+                    self.limiter, (region, client_class.__name__), self.metrics)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.built += 1
+                self.build_seconds += elapsed
+                self._clients.append(client)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._idle[key].append(client)
+
+    def close(self):
+        """Closes the HTTP session of every client the pool has built."""
+        with self._lock:
+            clients, self._clients, self._idle = self._clients, [], {}
+        for client in clients:
+            try:
+                client.base_client.session.close()
+            except Exception:
+                pass
+
+    def report(self):
+        """Returns a one-line summary of clients built and the construction time saved by reuse."""
+        average = self.build_seconds / self.built if self.built else 0.0
+        return (f"Client pool: built {self.built} clients in {self.build_seconds:.2f}s, reused {self.reused} times "
+                f"(~{average * self.reused:.2f}s of client construction and {self.reused} new TLS sessions avoided)")
+
+# -------- Stop Completion Waiter --------
+STOPPED_STATES = ("STOPPED", "INACTIVE")
+# States a started resource is confirmed in (--start --wait).
+STARTED_STATES = ("RUNNING", "AVAILABLE", "ACTIVE")
+# States that end the wait even though the resource never got where it was sent.
+TERMINAL_STATES = ("FAILED", "TERMINATED", "DELETED", "NOT_FOUND")
+
+class CompletionWaiter:
+    """
+    Confirms stop requests by polling the stopped resources in batches.
+    Each round polls every pending resource on a bounded pool of pollers, then sleeps for a
+    growing interval, until all of them reach one of `done_states` or a terminal state or the deadline passes.
+    Pass done_states=STARTED_STATES to confirm start requests instead.
+    """
+
+    def __init__(self, pool, max_pollers=8, timeout=1800.0, first_interval=5.0, max_interval=60.0,
+                 done_states=STOPPED_STATES):
+        self.pool = pool
+        self.done_states = done_states
+        self.max_pollers = max_pollers
+        self.timeout = timeout
+        self.first_interval = first_interval
+        self.max_interval = max_interval
+        self._pending = {}
+
+    def add(self, region, resource_type, resource_id, issued_at):
+        """Registers a resource whose stop request was accepted at `issued_at` (epoch seconds)."""
+        self._pending[resource_id] = (region, resource_type, issued_at)
+
+    def poll(self, resource_id):
+        """Returns the current lifecycle state of one resource."""
+        region, resource_type, _ = self._pending[resource_id]
+        with self.pool.client(get_client_class(resource_type), region) as client:
+            try:
+                return getattr(client, RESOURCE_TYPES[resource_type].get)(resource_id).data.lifecycle_state
+            except oci.exceptions.ServiceError as se:
+                if se.status == 404:
+                    return "NOT_FOUND"
+                raise
+
+    def wait(self):
+        """
+        Polls until done or the deadline passes.
+        Returns {resource_id: (final_state, seconds)}; final_state is the last state seen and
+        seconds is only set for resources that reached one of the done states.
+        A poll that fails with a non-retryable error (e.g. 401/403, or a get call the client lacks) ends the
+        wait for that resource with final_state "ERROR <error class>"; each kind of error is printed once.
+        """
+        outcomes, last_states = {}, {}
+        reported = set()
+        pending = set(self._pending)
+        deadline = time.monotonic() + self.timeout
+        interval = self.first_interval
+        with ThreadPoolExecutor(max_workers=self.max_pollers) as executor:
+            while pending:
+                futures = {executor.submit(self.poll, resource_id): resource_id for resource_id in pending}
+                for future in as_completed(futures):
+                    resource_id = futures[future]
+                    try:
+                        state = future.result()
+                    except Exception as e:
+                        if is_retryable(e):
+                            continue
+                        resource_type = self._pending[resource_id][1]
+                        outcomes[resource_id] = (f"ERROR {error_class(e)}", None)
+                        if (resource_type, error_class(e)) not in reported:
+                            reported.add((resource_type, error_class(e)))
+                            emit(f"  Cannot poll {resource_type} {resource_id}, not waiting for it or other "
+                                 f"{resource_type} resources failing the same way: {e}")
+                        continue
+                    last_states[resource_id] = state
+                    if state in self.done_states:
+                        outcomes[resource_id] = (state, time.time() - self._pending[resource_id][2])
+                    elif state in TERMINAL_STATES:
+                        outcomes[resource_id] = (state, None)
+                pending.difference_update(outcomes)
+                remaining = deadline - time.monotonic()
+                if not pending or remaining <= 0:
+                    break
+                emit(f"  Waiting for {len(pending)} resources to reach {'/'.join(self.done_states)} "
+                     f"(next check in {min(interval, remaining):.0f}s) ...")
+                time.sleep(min(interval, remaining))
+                interval = min(self.max_interval, interval * 1.5)
+        for resource_id in pending:
+            outcomes[resource_id] = (last_states.get(resource_id, "UNKNOWN"), None)
+        return outcomes
+
+# -------- Bulk Stop Execution --------
+class SharedClient:
+    """
+    Stands in for one SDK client but borrows a pooled client for (client_class, region) for each
+    method call, so a job can have many calls in flight at once, each on its own kept-alive connection.
+    """
+
+    def __init__(self, pool, client_class, region):
+        self._pool = pool
+        self._client_class = client_class
+        self._region = region
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            with self._pool.client(self._client_class, self._region) as client:
+                return getattr(client, name)(*args, **kwargs)
+        call.__name__ = name
+        return call
+
+class BulkStopper:
+    """
+    Runs stop calls grouped per (region, service) on one shared thread pool, with at most
+    `concurrency` calls in flight per group across all jobs.
+    None of the supported services has a batch stop API, so this is the bulk path: many single-resource
+    calls at once over pooled connections, still paced by the rate limiter, each with its own outcome.
+    """
+
+    def __init__(self, concurrency, max_threads):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="stop")
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args):
+        """Queues func(*args) in group `key`, blocking while the group already has `concurrency` calls in flight."""
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.concurrency)
+        slot.acquire()
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            slot.release()
+            raise
+        future.add_done_callback(lambda _: slot.release())
+        return future
+
+    def close(self):
+        """Waits for queued calls and stops the worker threads."""
+        self._executor.shutdown(wait=True)
+
+# -------- Run Summary --------
+class RunSummary:
+    """
+    Success and failure counts per (region, compartment, type) job, updated from the worker threads
+    as each result record arrives, so the summary is ready the moment the last job ends.
+    Only failed records are kept (to list them); every success is already in the log.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.failures = {}
+        self.succeeded = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def add(self, job, record):
+        failed = record.status == "failed"
+        with self._lock:
+            counts = self.counts.get(job)
+            if counts is None:
+                counts = self.counts[job] = [0, 0]
+            counts[failed] += 1
+            if failed:
+                self.failed += 1
+                self.failures.setdefault(job, []).append(record)
+            else:
+                self.succeeded += 1
+
+    def print(self, order, jobs_run, planning=False, action="stop"):
+        """
+        Prints the counts and failures of every job that had results, in the (region, compartment, type)
+        order of `order`, and how many of the `jobs_run` jobs had nothing to do.
+        """
+        print("\n======= Summary =======")
+        for job in order:
+            counts = self.counts.get(job)
+            if counts is None:
+                continue
+            region, comp, resource_type = job
+            print(f"\n[Region: {region}] [{resource_type}] Compartment: {comp}")
+            if counts[0]:
+                print(f"  {'Planned' if planning else 'Successful'}: {counts[0]}")
+            else:
+                print("  No successful actions.")
+            if counts[1]:
+                print("  Failed:")
+                for f in self.failures[job]:
+                    print(f"    - {f.resource_name} ({f.resource_id}): {f.message}")
+            else:
+                print("  No failed actions.")
+        quiet = jobs_run - len(self.counts)
+        if quiet:
+            print(f"\n{quiet} jobs had nothing to {'plan' if planning else action}.")
+        print(f"\nTotal: {self.succeeded} {'planned' if planning else 'successful'}, {self.failed} failed "
+              f"(every resource is in the {'plan' if planning else 'log'} file).")
+
+# -------- Concurrent Job Execution --------
+def stop_resources_in_compartment(pool, region, resource_type, compartment_ocid, resources=None, bulk=None,
+                                  action="stop"):
+    """
+    Borrows the client for resource_type in region from the pool and stops its resources in one compartment.
+    When `resources` is given (Search discovery) they are stopped directly instead of listing the compartment.
+    With a BulkStopper the stop calls go through it, grouped under (region, client class).
+    With action="start" the type's start function is run on `resources` instead.
+    """
+    client_class = get_client_class(resource_type)
+    handler = getattr(RESOURCE_TYPES[resource_type], action)
+    if bulk is not None:
+        _job_context.bulk = (bulk, (region, client_class.__name__))
+        try:
+            return handler(SharedClient(pool, client_class, region), compartment_ocid, resources=resources)
+        finally:
+            _job_context.bulk = None
+    with pool.client(client_class, region) as client:
+        return handler(client, compartment_ocid, resources=resources)
+
+def run_job(pool, job, slots, resources=None, handle_result=None, skip_ids=(), planning=False, bulk=None,
+            resource_filter=None, action="stop"):
+    """
+    Runs one (region, compartment, resource_type) job on a worker thread.
+    Holds one of the (region, resource_type) concurrency slots for the duration and buffers all output
+    so it can be printed as one block once the job finishes. Each result record is passed to
+    handle_result(job, record) the moment its action completes; resources in `skip_ids` are not
+    stopped again, and with `planning` nothing is stopped at all. Stop calls go through `bulk`
+    (a BulkStopper) when given; only resources matching `resource_filter` are stopped.
+    With action="start" the resources are started instead (--start).
+    Returns (result, output_lines).
+    """
+    region, compartment_ocid, resource_type = job
+    _job_context.lines = [f"\n== [{region}] [{resource_type}] Handling Compartment: {compartment_ocid}"]
+    _job_context.skip_ids = skip_ids
+    _job_context.planning = planning
+    _job_context.resource_filter = resource_filter
+    exact_name = resource_filter.exact_name() if resource_filter else None
+    name_param = RESOURCE_TYPES[resource_type].name_filter
+    _job_context.list_filters = {name_param: exact_name} if exact_name and name_param else None
+    if handle_result is not None:
+        _job_context.on_result = lambda record: handle_result(job, record)
+    try:
+        with slots[(region, resource_type)]:
+            try:
+                result = stop_resources_in_compartment(pool, region, resource_type, compartment_ocid, resources,
+                                                       bulk, action)
+            except Exception as e:
+                failure = ResultRecord("", "", "failed", f"Unexpected error: {e}")
+                record_result(failure)
+                result = {"success": [], "failed": [failure]}
+        return result, _job_context.lines
+    finally:
+        _job_context.lines = None
+        _job_context.on_result = None
+        _job_context.skip_ids = ()
+        _job_context.planning = False
+        _job_context.resource_filter = None
+        _job_context.list_filters = None
+
+def interleave_jobs(regions, compartment_ocids, resource_types, discovered=None):
+    """
+    Orders (region, compartment, resource_type) jobs round-robin across types and regions so the
+    per-(region, type) caps rarely stall workers and every service is busy from the start.
+    With Search results in `discovered` ({(region, type): {compartment: [resources]}}, None where the
+    type falls back to listing), jobs where Search found nothing are dropped.
+    """
+    jobs = []
+    for compartment_ocid in compartment_ocids:
+        for region in regions:
+            for resource_type in resource_types:
+                found = (discovered or {}).get((region, resource_type))
+                if found is None or compartment_ocid in found:
+                    jobs.append((region, compartment_ocid, resource_type))
+    return jobs
+
+def discover_with_search(pool, regions, resource_types, compartment_ocids, max_workers, conditions=()):
+    """
+    Runs one Resource Search discovery per (region, type) in parallel for the types Search indexes.
+    Returns {(region, type): {compartment: [resources]}}; pairs whose search fails are left out and
+    are handled with per-compartment list calls instead.
+    """
+    discovered = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(discover_region, pool, region, resource_type, compartment_ocids, conditions):
+                   (region, resource_type) for region in regions for resource_type in resource_types}
+        for future in as_completed(futures):
+            region, resource_type = futures[future]
+            try:
+                found = future.result()
+            except Exception as e:
+                emit(f"  [{region}] Search for {resource_type} failed, falling back to list calls: {e}")
+                continue
+            discovered[(region, resource_type)] = found
+            count = sum(len(resources) for resources in found.values())
+            emit(f"  [{region}] Search found {count} {resource_type} resources in {len(found)} compartments")
+    return discovered
 
 # -------- Main Control Logic --------
-def main():
+def parse_args(argv):
+    """Parses the command line."""
+    parser = argparse.ArgumentParser(
+        prog="stop_resources.py",
+        description="Stops OCI resources of one or more types in the given compartments across all subscribed regions.")
+    parser.add_argument("resource_types", metavar="resource_type", type=parse_resource_types, nargs="?",
+                        help="'all', or one or a comma-separated list of: " + ", ".join(RESOURCE_TYPES))
+    parser.add_argument("csv_file", nargs="?",
+                        help="CSV file with compartment OCIDs, one per line; add ',recursive' to include sub-compartments")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="maximum number of (region, compartment, type) jobs running at once (default: 8)")
+    parser.add_argument("--max-per-region", type=int, default=4,
+                        help="maximum number of concurrent jobs for each (region, type) pair (default: 4)")
+    parser.add_argument("--discovery", choices=("list", "search"), default="list",
+                        help="find candidates with per-compartment list calls (default) or one Resource Search "
+                             "query per region; types Search does not index always use list calls")
+    parser.add_argument("--rate-limit", type=float, default=10.0,
+                        help="starting requests per second for each (region, service); adapts to throttling "
+                             "(default: 10)")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="retries for throttled (429) and transient 5xx/connection failures (default: 5)")
+    parser.add_argument("--filter", metavar="CLAUSE", dest="filters", type=parse_filter_clause, action="append",
+                        default=[],
+                        help="only stop resources matching CLAUSE (repeatable, all must hold): tag:KEY[=VALUES], "
+                             "tag:NAMESPACE.KEY[=VALUES], name=VALUES, shape=VALUES or age>/<N[smhdw]; VALUES are "
+                             "comma-separated glob patterns and a leading '!' negates, e.g. '!tag:DoNotStop'")
+    parser.add_argument("--filter-file", metavar="FILE",
+                        help="read more filter clauses from FILE, one per line (# starts a comment)")
+    parser.add_argument("--stop-concurrency", type=int, default=8,
+                        help="stop calls in flight at once per (region, service), shared by all jobs; "
+                             "1 stops resources one at a time inside each job (default: 8)")
+    parser.add_argument("--wait", action="store_true",
+                        help="after stopping, poll every stopped resource until it reaches STOPPED/INACTIVE "
+                             "and log its final state and time to stop; with --start, wait for every tier to "
+                             "reach RUNNING/AVAILABLE/ACTIVE before starting the next")
+    parser.add_argument("--wait-timeout", type=float, default=1800,
+                        help="seconds to keep polling in --wait mode (default: 1800)")
+    parser.add_argument("--log-format", choices=("csv", "jsonl"), default="csv",
+                        help="format of the streamed log file (default: csv)")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="continue an interrupted run from its checkpoint file: completed "
+                             "(region, compartment, type) units are skipped and resources it already "
+                             "stopped are not stopped again")
+    parser.add_argument("--plan", action="store_true",
+                        help="dry run: discover only and write the resources that would be stopped to a plan file")
+    parser.add_argument("--plan-file", metavar="PATH",
+                        help="plan file written by --plan (default: stop_<type>_plan_<timestamp>.csv)")
+    parser.add_argument("--apply", metavar="PLAN_FILE",
+                        help="stop exactly the resources in a plan file, without listing or region discovery")
+    parser.add_argument("--start", metavar="LOG_OR_PLAN",
+                        help="start again the resources an earlier run stopped, read from its log (or a plan "
+                             "file), without listing or region discovery; types are started tier by tier")
+    parser.add_argument("--start-tier", metavar="TYPE=N", dest="start_tiers", type=parse_start_tier,
+                        action="append", default=[],
+                        help="with --start, start TYPE in tier N; lower tiers go first (defaults: 0 databases, "
+                             "data stores and network, 1 platform services, 2 compute)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="where to write the JSON report of per-call latency, errors and retries "
+                             "(default: stop_<type>_metrics_<timestamp>.json)")
+    parser.add_argument("--prometheus", metavar="FILE",
+                        help="also write the call metrics in Prometheus text format (e.g. for node_exporter's "
+                             "textfile collector)")
+    parser.add_argument("--yes", "-y", action="store_true",
+                        help="do not ask for confirmation before stopping (for cron and other unattended runs)")
+    parser.add_argument("--daemon", metavar="SCHEDULE_FILE",
+                        help="keep running with warm clients and caches, run the entries of SCHEDULE_FILE at their "
+                             "times and accept triggered runs on a Unix socket")
+    parser.add_argument("--socket", metavar="PATH",
+                        help=f"Unix socket of the daemon (default: <cache-dir>/{profile}.sock)")
+    parser.add_argument("--trigger", metavar="ENTRY", help="ask the running daemon to run a schedule entry now")
+    parser.add_argument("--send", action="store_true",
+                        help="ask the running daemon to run this command line now instead of running it here")
+    parser.add_argument("--profile", metavar="NAME[,NAME...]", dest="profiles", type=parse_profiles,
+                        action="append", default=[],
+                        help=f"OCI config profile(s) to run against (default: {profile}); with several, each "
+                             "profile runs in its own process and the logs and metrics are merged. '{profile}' "
+                             "in the compartments, --apply and --start file names is replaced per profile")
+    parser.add_argument("--region-shards", type=int, default=1,
+                        help="split each profile's subscribed regions into N groups, one process each (default: 1)")
+    parser.add_argument("--processes", type=int,
+                        help="processes running at once in a sharded run (default: one per profile and region group)")
+    parser.add_argument("--region-shard", metavar="K/N", type=parse_region_shard,
+                        help="only handle the K-th of N groups of subscribed regions (set for each process of a "
+                             "sharded run; also splits one run across machines)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"where region subscriptions and the compartment tree are cached (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-ttl", type=float, default=24,
+                        help="hours before cached region subscriptions / compartment tree are refetched (default: 24)")
+    parser.add_argument("--refresh-cache", action="store_true",
+                        help="ignore the cache and refetch region subscriptions and the compartment tree")
+    parser.add_argument("--prune", action="store_true",
+                        help="skip (region, compartment, type) combinations that have not had resources "
+                             "recently, according to the region affinity index")
+    parser.add_argument("--full-sweep", action="store_true",
+                        help="with --prune, visit every combination this run anyway")
+    parser.add_argument("--full-sweep-days", type=float, default=7,
+                        help="days between automatic full sweeps per type with --prune (default: 7)")
+    parser.add_argument("--affinity-expiry-days", type=float, default=30,
+                        help="days after which a combination last seen with resources is pruned (default: 30)")
+    parser.add_argument("--affinity-from-log", metavar="LOG", action="append", default=[],
+                        help="seed the region affinity index from a previous run's log (repeatable)")
+    args = parser.parse_args(argv)
+    args.profiles = list(dict.fromkeys(name for names in args.profiles for name in names))
+    args.profile = args.profiles[0] if args.profiles else profile
+    if args.region_shards < 1 or (args.processes is not None and args.processes < 1):
+        parser.error("--region-shards and --processes must be at least 1")
+    if is_sharded(args):
+        if args.region_shard:
+            parser.error("--region-shard is set per process by sharded runs; do not combine it with them")
+        if args.daemon or args.trigger or args.send or args.resume:
+            parser.error("sharded runs (several --profile or --region-shards) cannot use --daemon, --trigger, "
+                         "--send or --resume; resume each shard from its own checkpoint")
+    if args.daemon or args.trigger:
+        if args.daemon and args.trigger:
+            parser.error("--daemon and --trigger cannot be combined")
+        if args.resource_types or args.csv_file or args.apply or args.start or args.send:
+            parser.error("--daemon and --trigger take no resource types, compartments, --apply, --start or --send")
+        return args
+    if args.filter_file:
+        try:
+            args.filters += read_filter_file(args.filter_file)
+        except (OSError, argparse.ArgumentTypeError) as e:
+            parser.error(f"--filter-file: {e}")
+    if args.apply or args.start:
+        option, source = ("--apply", "plan file") if args.apply else ("--start", "log or plan file")
+        if args.apply and args.start:
+            parser.error("--apply and --start cannot be combined")
+        if args.plan:
+            parser.error(f"--plan and {option} cannot be combined")
+        if args.resource_types or args.csv_file:
+            parser.error(f"{option} takes its resource types and compartments from the {source}")
+        if args.filters or args.filter_file:
+            parser.error(f"{option} acts on exactly the listed resources; give --filter when stopping")
+    elif not args.resource_types or not args.csv_file:
+        parser.error("resource_type and csv_file are required unless --apply or --start is given")
+    if "{profile}" in (args.csv_file or args.apply or args.start or "") and not args.profiles:
+        parser.error("'{profile}' in a file name needs --profile")
+    source_file = args.apply or args.start
+    if source_file and not args.profiles and os.path.exists(source_file) and has_profile_column(source_file):
+        parser.error(f"{source_file} is the combined file of a sharded run; choose its profile(s) with --profile")
+    if args.start_tiers and not args.start:
+        parser.error("--start-tier only applies to --start")
+    if args.plan and (args.resume or args.wait):
+        parser.error("--plan does not stop anything, so --resume and --wait do not apply")
+    if args.plan_file and not args.plan:
+        parser.error("--plan-file only names the file written by --plan")
+    if args.max_workers < 1 or args.max_per_region < 1 or args.stop_concurrency < 1:
+        parser.error("--max-workers, --max-per-region and --stop-concurrency must be at least 1")
+    if args.rate_limit <= 0 or args.max_retries < 0:
+        parser.error("--rate-limit must be positive and --max-retries must not be negative")
+    return args
+
+class Session:
+    """
+    The SDK config, rate limiter, call metrics, client pool and tenancy cache that runs work with.
+    A command-line run builds one and closes it when done; the daemon keeps one open, so every run
+    it starts finds warm clients and connections, learned rate limits and cached regions and compartments.
     """
-    Main control logic for stopping resources specified by type and compartments,
+
+    def __init__(self, args):
+        self.profile = args.profile
+        self.config = oci.config.from_file(profile_name=args.profile)
+        self.tenancy_id = self.config["tenancy"]
+        self.limiter = AdaptiveRateLimiter(rate=args.rate_limit, max_retries=args.max_retries)
+        self.metrics = CallMetrics()
+        self.pool = ClientPool(self.config, self.limiter, self.metrics)
+        self.cache = self.tenancy_cache(args)
+
+    def tenancy_cache(self, args):
+        """Opens the tenancy cache for the profile under args.cache_dir."""
+        return TenancyCache(os.path.join(args.cache_dir, f"{self.profile}.json"), self.tenancy_id, args.cache_ttl * 3600,
+                            invalidate=args.refresh_cache)
+
+    def identity_client(self):
+        """Borrows an identity client for the home region of the config."""
+        return self.pool.client(oci_service("identity").IdentityClient, self.config["region"])
+
+    def counters(self):
+        """The cumulative client pool and rate limiter counters, named as in the metrics report."""
+        return {"clients_built": self.pool.built, "clients_reused": self.pool.reused,
+                "client_build_seconds": self.pool.build_seconds, "limiter_calls": self.limiter.calls,
+                "limiter_throttles": self.limiter.throttles, "limiter_retries": self.limiter.retries,
+                "limiter_give_ups": self.limiter.give_ups, "limiter_wait_seconds": self.limiter.wait_seconds}
+
+    def close(self):
+        self.pool.close()
+
+def unique_timestamp(patterns):
+    """
+    The UTC timestamp that names a run's files. Daemon runs can start within the same second, so while
+    a file named by any of `patterns` (with "{}" for the timestamp) exists, a -2, -3, ... suffix is added.
+    """
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    candidate, n = stamp, 1
+    while any(os.path.exists(pattern.format(candidate)) for pattern in patterns):
+        n += 1
+        candidate = f"{stamp}-{n}"
+    return candidate
+
+def run_label(resource_types):
+    """Names a run in its file names: the single type, "all" or "multi"."""
+    if len(resource_types) == 1:
+        return resource_types[0]
+    return "all" if len(resource_types) == len(RESOURCE_TYPES) else "multi"
+
+def shard_suffix(args):
+    """File name suffix of a run against a --profile and/or a --region-shard, e.g. "_prod_r2of4"."""
+    suffix = f"_{args.profile}" if args.profiles else ""
+    if args.region_shard:
+        suffix += "_r{}of{}".format(*args.region_shard)
+    return suffix
+
+def run_stop(args, session=None):
+    """
+    Main control logic for stopping resources of the requested types in the given compartments,
     across all subscribed regions.
-    Automatically generates a log file named by resource type and timestamp.
-    """
-    if len(sys.argv) != 3:
-        print("Usage: python stop_resources.py <resource_type> <compartment_ocids.csv>")
-        print("resource_type can be: compute, autonomous_database, generative_ai, visualbuilder, ai_language, analytics_cloud, data_science, ai_data_platform, mysql, integration_cloud, big_data, oracle_digital_assistant, data_integration, network_firewall, blockchain_cloud_service, opensearch, redis")
-        sys.exit(1)
-    resource_type = sys.argv[1].lower()
-    csv_file = sys.argv[2]
-    timestamp_str = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    log_file_path = f"stop_{resource_type}_log_{timestamp_str}.csv"
-
-    compartment_ocids = read_compartments_from_csv(csv_file)
-    print(f"You requested to stop ALL {resource_type} resources in these compartments:")
-    for c in compartment_ocids:
-        print(f"  - {c}")
-    confirm = input("Are you sure? (y/N): ")
-    if confirm.lower() != "y":
-        print("Operation cancelled.")
-        sys.exit(0)
-
-    config = oci.config.from_file(profile_name=profile)
-    identity = oci.identity.IdentityClient(config)
-    tenancy_id = config["tenancy"]
-    available_regions = [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-
-    results = {}
-    log_rows = []
-    timestamp = datetime.datetime.utcnow().isoformat()
-
-    for region in available_regions:
-        print(f"\n##### Processing region: {region} #####")
-        config["region"] = region
-        for compartment_ocid in compartment_ocids:
-            print(f"\n== Handling Compartment: {compartment_ocid}")
-            if resource_type == "compute":
-                compute_client = oci.core.ComputeClient(config)
-                result = stop_compute_instances(compute_client, compartment_ocid)
-            elif resource_type == "autonomous_database":
-                db_client = oci.database.DatabaseClient(config)
-                result = stop_autonomous_databases(db_client, compartment_ocid)
-            elif resource_type == "generative_ai":
-                genai_client = oci.generative_ai.GenerativeAiClient(config)
-                result = stop_generative_ai_endpoints(genai_client, compartment_ocid)
-            elif resource_type == "visualbuilder":
-                vb_client = oci.vb_service.VbInstanceClient(config)
-                result = stop_visual_builder_instances(vb_client, compartment_ocid)
-            elif resource_type == "ai_language":
-                lang_client = oci.ai_language.AIServiceLanguageClient(config)
-                result = stop_ai_language_endpoints(lang_client, compartment_ocid)
-            elif resource_type == "analytics_cloud":
-                analytics_client = oci.analytics.AnalyticsClient(config)
-                result = stop_analytics_instances(analytics_client, compartment_ocid)
-            elif resource_type == "data_science":
-                ds_client = oci.data_science.DataScienceClient(config)
-                result = stop_data_science_notebooks(ds_client, compartment_ocid)
-            elif resource_type == "ai_data_platform":
-                adp_client = oci.ai_data_platform.AiDataPlatformClient(config)
-                result = stop_ai_data_platform_pipeline_runs(adp_client, compartment_ocid)
-            elif resource_type == "mysql":
-                mysql_client = oci.mysql.DbSystemClient(config)
-                result = stop_mysql_db_systems(mysql_client, compartment_ocid)
-            elif resource_type == "integration_cloud":
-                oic_client = oci.integration.IntegrationInstanceClient(config)
-                result = stop_integration_instances(oic_client, compartment_ocid)
-            elif resource_type == "big_data":
-                bds_client = oci.bds.BdsClient(config)
-                result = stop_big_data_clusters(bds_client, compartment_ocid)
-            elif resource_type == "oracle_digital_assistant":
-                oda_client = oci.oda.DigitalAssistantClient(config)
-                result = stop_oda_instances(oda_client, compartment_ocid)
-            elif resource_type == "data_integration":
-                di_client = oci.data_integration.DataIntegrationClient(config)
-                result = stop_data_integration_pipeline_runs(di_client, compartment_ocid)
-            elif resource_type == "network_firewall":
-                fw_client = oci.network_firewall.NetworkFirewallClient(config)
-                result = stop_network_firewalls(fw_client, compartment_ocid)
-            elif resource_type == "blockchain_cloud_service":
-                bc_client = oci.blockchain.BlockchainPlatformClient(config)
-                result = stop_blockchain_platforms(bc_client, compartment_ocid)
-            elif resource_type == "opensearch":
-                os_client = oci.opensearch.OpensearchClusterClient(config)
-                result = stop_opensearch_clusters(os_client, compartment_ocid)
-            elif resource_type == "redis":
-                redis_client = oci.cache.RedisClusterClient(config)
-                result = stop_redis_clusters(redis_client, compartment_ocid)
+    Every (region, compartment, resource_type) job shares one bounded thread pool, one client pool
+    and one region discovery, so a multi-type run takes about as long as its slowest type.
+    Streams every action to a log file named by resource type and timestamp as it happens.
+    With --plan only discovery runs and the targets go to a plan file; --apply stops exactly the
+    resources in a plan file without listing anything, and --start starts the resources in a stop
+    log or plan file again, one tier of resource types after the other.
+    Without a `session` one is built for this run and closed at the end; with one (daemon mode) it
+    is reused as is and nothing is asked interactively.
+    Returns the paths of the log (or plan) and metrics files and the metrics report.
+    """
+    action = "start" if args.start else "stop"
+    if args.start:
+        plan = load_restart_targets(args.start, args.profile)
+        for resource_type in sorted({t for _, _, t in plan if RESOURCE_TYPES[t].start is None}):
+            print(f"{resource_type} resources cannot be started again; leaving them out.")
+        plan = {job: resources for job, resources in plan.items() if RESOURCE_TYPES[job[2]].start}
+    else:
+        plan = load_plan(args.apply, args.profile) if args.apply else None
+    if plan is not None:
+        regions, compartment_ocids, resource_types = plan_dimensions(plan)
+    else:
+        resource_types = args.resource_types
+        compartment_rows = read_compartment_rows(args.csv_file)
+    # Runs against a named profile, and each region group of a sharded run, get their own file names.
+    run_name = run_label(resource_types) + shard_suffix(args)
+    timestamp_str = unique_timestamp([f"{action}_{run_name}_log_{{}}.{args.log_format}",
+                                      f"{action}_{run_name}_checkpoint_{{}}.jsonl", f"stop_{run_name}_plan_{{}}.csv",
+                                      f"{action}_{run_name}_metrics_{{}}.json"])
+    log_file_path = f"{action}_{run_name}_log_{timestamp_str}.{args.log_format}"
+    checkpoint_path = args.resume or f"{action}_{run_name}_checkpoint_{timestamp_str}.jsonl"
+    plan_path = args.plan_file or f"stop_{run_name}_plan_{timestamp_str}.csv"
+    metrics_path = args.metrics or f"{action}_{run_name}_metrics_{timestamp_str}.json"
+    done_units, acted = load_checkpoint(args.resume) if args.resume else (set(), set())
+    resource_filter = ResourceFilter(args.filters)
+
+    interactive = session is None
+    if interactive:
+        session = Session(args)
+    else:
+        session.metrics.reset()
+        if args.refresh_cache:
+            session.cache = session.tenancy_cache(args)
+    limiter, metrics, pool, tenancy_id = session.limiter, session.metrics, session.pool, session.tenancy_id
+    # A daemon session's counters run on across runs; the metrics report covers this run only.
+    baseline = session.counters()
+    if plan is None:
+        with session.identity_client() as identity:
+            regions = session.cache.regions(identity)
+            compartment_ocids = session.cache.expand(identity, compartment_rows)
+    if args.region_shard:
+        shard, shards = args.region_shard
+        regions = sorted(regions)[shard - 1::shards]
+        if plan is not None:
+            plan = {job: resources for job, resources in plan.items() if job[0] in regions}
+    # Region groups of one profile index different regions, so each keeps its own affinity file.
+    affinity_name = f"{args.profile}_affinity" + (f"_r{shard}of{shards}" if args.region_shard else "")
+    affinity = AffinityIndex(os.path.join(args.cache_dir, f"{affinity_name}.json"), tenancy_id,
+                             args.full_sweep_days * 86400, args.affinity_expiry_days * 86400)
+    for log_path in args.affinity_from_log:
+        affinity.seed_from_log(log_path, args.profile)
+
+    if plan is not None:
+        source = f"recorded in {args.start}" if args.start else f"planned in {args.apply}"
+        print(f"You requested to {action} the {sum(len(r) for r in plan.values())} resources {source}:")
+        for resource_type in resource_types:
+            count = sum(len(r) for (_, _, t), r in plan.items() if t == resource_type)
+            print(f"  - {resource_type}: {count}")
+    elif args.plan:
+        print(f"Planning which {', '.join(resource_types)} resources would be stopped in {len(compartment_ocids)} "
+              f"compartments (nothing will be stopped).")
+    else:
+        print(f"You requested to stop ALL {', '.join(resource_types)} resources in these compartments:")
+        for c in compartment_ocids:
+            print(f"  - {c}")
+    if resource_filter:
+        print(f"Only resources matching: {resource_filter.describe()}")
+    if not args.plan and interactive and not args.yes:
+        confirm = input("Are you sure? (y/N): ")
+        if confirm.lower() != "y":
+            print("Operation cancelled.")
+            sys.exit(0)
+
+    if args.plan:
+        plan_sink = LogSink(plan_path, fields=PLAN_FIELDS)
+        print(f"\nWriting plan to {plan_path}")
+    else:
+        log_sink = LogSink(log_file_path, log_format=args.log_format)
+        checkpoint = LogSink(checkpoint_path, log_format="jsonl")
+        print(f"\nStreaming log to {log_file_path}, checkpoint to {checkpoint_path}")
+        if args.resume:
+            print(f"Resuming: {len(done_units)} units already completed, "
+                  f"{len(acted)} resources already {ACTION_TEXT[action]['done']}")
+
+    summary = RunSummary()
+
+    def handle_result(job, record):
+        """Counts one result record and streams it to the plan file, or to the log and checkpoint."""
+        summary.add(job, record)
+        if args.plan:
+            plan_sink.write(make_plan_row(*job, record))
+            return
+        log_sink.write(make_log_row(*job, record))
+        if record.status == "success":
+            checkpoint.write({"acted": record.resource_id})
+
+    discovered = None
+    if plan is not None:
+        discovered = {}
+        for (region, compartment_ocid, resource_type), resources in plan.items():
+            discovered.setdefault((region, resource_type), {})[compartment_ocid] = resources
+    elif args.discovery == "search" and not resource_filter.searchable():
+        print("\nResource Search results do not include shapes; using per-compartment list calls for this filter.")
+    elif args.discovery == "search":
+        searchable = [t for t in resource_types if RESOURCE_TYPES[t].search]
+        for resource_type in resource_types:
+            if resource_type not in searchable:
+                print(f"\nResource Search does not index {resource_type}; using per-compartment list calls.")
+        if searchable:
+            print(f"\n##### Discovering {', '.join(searchable)} resources with Resource Search #####")
+            discovered = discover_with_search(pool, regions, searchable, compartment_ocids, args.max_workers,
+                                              resource_filter.search_conditions())
+
+    jobs = [job for job in interleave_jobs(regions, compartment_ocids, resource_types, discovered)
+            if job not in done_units]
+    if plan is not None:
+        jobs = [job for job in jobs if job in plan]
+    sweeping = []
+    if args.prune and discovered is None:
+        sweeping = [t for t in resource_types if args.full_sweep or affinity.sweep_due(t)]
+        if sweeping:
+            print(f"\nFull sweep for {', '.join(sweeping)}: visiting every region and compartment.")
+        if not args.full_sweep:
+            unpruned = len(jobs)
+            jobs = [job for job in jobs if affinity.keep(job)]
+            print(f"Region affinity index pruned {unpruned - len(jobs)} of {unpruned} jobs.")
+    # Jobs run in waves: everything at once when stopping, one start tier after the other with --start.
+    waves = [jobs]
+    if action == "start":
+        tiers = {t: RESOURCE_TYPES[t].start_tier for t in resource_types}
+        tiers.update((t, tier) for t, tier in args.start_tiers if t in tiers)
+        waves = [[job for job in jobs if tiers[job[2]] == tier] for tier in sorted(set(tiers.values()))]
+        waves = [wave for wave in waves if wave]
+    slots = {(region, resource_type): threading.BoundedSemaphore(args.max_per_region)
+             for region in regions for resource_type in resource_types}
+    print(f"\n##### Processing {len(jobs)} jobs across {len(regions)} regions "
+          f"(max {args.max_workers} workers, {args.max_per_region} per region and type, "
+          f"{args.stop_concurrency} {action} calls per region and service) #####")
+    done_states = STARTED_STATES if action == "start" else STOPPED_STATES
+    done_text = ACTION_TEXT[action]["done"]
+    # Only what --wait and the affinity sweep need is kept per finished job; the rest is counted in `summary`.
+    job_results = {}
+    listed_jobs = set()
+    outcomes = {}
+    bulk = None
+    if args.stop_concurrency > 1 and not args.plan:
+        bulk = BulkStopper(args.stop_concurrency, args.max_workers * args.stop_concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+            for number, wave in enumerate(waves, 1):
+                if len(waves) > 1:
+                    wave_types = sorted({job[2] for job in wave}, key=resource_types.index)
+                    print(f"\n##### Start tier {number} of {len(waves)}: {', '.join(wave_types)} #####")
+                futures = {}
+                for job in wave:
+                    region, compartment_ocid, resource_type = job
+                    found = (discovered or {}).get((region, resource_type))
+                    resources = found[compartment_ocid] if found is not None else None
+                    future = executor.submit(run_job, pool, job, slots, resources, handle_result, acted,
+                                             args.plan, bulk, resource_filter, action)
+                    futures[future] = job
+                try:
+                    for future in as_completed(futures):
+                        result, output_lines = future.result()
+                        job = futures[future]
+                        if args.wait:
+                            job_results[job] = result["success"]
+                        if unit_listed(result):
+                            listed_jobs.add(job)
+                        if any(r.resource_id for r in result["success"] + result["failed"]):
+                            affinity.record(*job)
+                        if not args.plan and unit_completed(result):
+                            checkpoint.write({"done": list(job)})
+                        with _output_lock:
+                            print("\n".join(output_lines))
+                except BaseException as e:
+                    for future in futures:
+                        future.cancel()
+                    if not args.plan and isinstance(e, KeyboardInterrupt):
+                        print(f"\nInterrupted; waiting for running jobs to finish. "
+                              f"Continue later with --resume {checkpoint_path}")
+                    raise
+
+                if args.wait and not args.plan:
+                    waiter = CompletionWaiter(pool, max_pollers=args.max_workers, timeout=args.wait_timeout,
+                                              done_states=done_states)
+                    wave_results = [(job, job_results[job]) for job in wave if job in job_results]
+                    for (region, _, resource_type), successes in wave_results:
+                        for s in successes:
+                            waiter.add(region, resource_type, s.resource_id, s.time)
+                    print(f"\n##### Waiting for {action} requests to complete (timeout {args.wait_timeout:.0f}s) #####")
+                    wave_outcomes = waiter.wait()
+                    outcomes.update(wave_outcomes)
+                    for job, successes in wave_results:
+                        for s in successes:
+                            final_state, seconds = wave_outcomes[s.resource_id]
+                            status = done_text if final_state in done_states else f"not_{done_text}"
+                            record = ResultRecord(s.resource_name, s.resource_id, status,
+                                                  f"State after --wait: {final_state}")
+                            log_sink.write(make_log_row(*job, record, final_state, seconds))
+                    behind = sum(1 for state, _ in wave_outcomes.values() if state not in done_states)
+                    if behind and number < len(waves):
+                        print(f"Warning: {behind} resources of this tier are not {done_text}; "
+                              f"starting the next tier anyway.")
+    finally:
+        if bulk is not None:
+            bulk.close()
+        if interactive:
+            session.close()
+        if not args.resume:
+            for resource_type in sweeping:
+                swept_jobs = [job for job in jobs if job[2] == resource_type]
+                if all(job in listed_jobs for job in swept_jobs):
+                    affinity.mark_swept(resource_type)
+        affinity.save()
+        if args.plan:
+            plan_sink.close()
+        else:
+            log_sink.close()
+            checkpoint.close()
+
+    summary.print(((region, compartment_ocid, resource_type) for region in regions
+                   for compartment_ocid in compartment_ocids for resource_type in resource_types),
+                  len(jobs), args.plan, action)
+    if args.wait and not args.plan:
+        confirmed = sum(1 for state, _ in outcomes.values() if state in done_states)
+        print(f"\n{action.capitalize()} confirmed for {confirmed} of {len(outcomes)} resources; "
+              f"{len(outcomes) - confirmed} did not reach a {done_text} state (see final_state in the log).")
+    print(f"\n{pool.report()}")
+    print(limiter.report())
+    report = metrics.report(
+        mode="plan" if args.plan else action, resource_types=resource_types, regions=len(regions),
+        jobs=len(jobs),
+        resources_succeeded=summary.succeeded, resources_failed=summary.failed,
+        **{name: round(value - baseline[name], 6) if isinstance(value, float) else value - baseline[name]
+           for name, value in session.counters().items()})
+    with open(metrics_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Call metrics written to {metrics_path}")
+    if args.prometheus:
+        with open(args.prometheus, "w") as f:
+            f.write(metrics.prometheus(report))
+        print(f"Prometheus metrics written to {args.prometheus}")
+    if args.plan:
+        print(f"\nPlan written to {plan_path} ({plan_sink.rows_written} resources). "
+              f"Review it, then run with --apply {plan_path}")
+    else:
+        print(f"\nLog written to {log_file_path} ({log_sink.rows_written} rows)")
+    return {"log": None if args.plan else log_file_path,
+            "plan": plan_path if args.plan else None, "metrics": metrics_path, "report": report}
+
+# -------- Sharded Runs --------
+# Several tenancies (profiles) and/or region groups are run as separate processes: each has its own
+# interpreter, GIL, client pool and connection limits, and their logs and metrics are merged at the end.
+
+def is_sharded(args):
+    """True when the command line asks for more than one process."""
+    return len(args.profiles) > 1 or args.region_shards > 1
+
+def shard_args(args, profile_name, region_shard):
+    """
+    The arguments of one shard: a single profile and region group, never asking, default file names
+    (a --plan FILE is written by run_sharded from the shards' plans).
+    """
+    child = argparse.Namespace(**vars(args))
+    child.profiles, child.profile = [profile_name], profile_name
+    child.region_shards, child.region_shard = 1, region_shard
+    child.processes, child.yes, child.metrics, child.prometheus = None, True, None, None
+    child.plan_file = None
+    for option in ("csv_file", "apply", "start"):
+        if getattr(child, option):
+            setattr(child, option, getattr(child, option).replace("{profile}", profile_name))
+    return child
+
+def run_shard(args, console_path):
+    """Runs one shard in a worker process with its output going to console_path; returns run_stop's result."""
+    with open(console_path, "w") as console, contextlib.redirect_stdout(console):
+        return run_stop(args)
+
+def merge_reports(reports):
+    """
+    Merges the (profile, report) pairs of the shards into one metrics report: every call is labelled
+    with its profile and the numeric run totals are summed.
+    """
+    run, calls = {}, []
+    for profile_name, report in reports:
+        for name, value in report["run"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                run[name] = run.get(name, 0) + value
+            elif name == "resource_types":
+                run[name] = list(dict.fromkeys(run.get(name, []) + value))
             else:
-                print(f"Resource type '{resource_type}' is not supported.")
+                run.setdefault(name, value)
+        calls += [dict(call, profile=profile_name) for call in report["calls"]]
+    return {"run": run, "calls": calls}
+
+def run_sharded(args):
+    """
+    Runs one process per profile and region group (at most --processes at once), each a complete
+    run_stop() with its own log, checkpoint and console file, then merges their logs into one combined
+    log (with a profile column) and their call metrics into one combined report.
+    """
+    action = "start" if args.start else "stop"
+    shards = [(name, (k, args.region_shards) if args.region_shards > 1 else None)
+              for name in args.profiles for k in range(1, args.region_shards + 1)]
+    processes = min(args.processes or len(shards), len(shards))
+    timestamp_str = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    if args.start:
+        target = f"the resources recorded in {args.start}"
+    elif args.apply:
+        target = f"the resources planned in {args.apply}"
+    else:
+        target = f"ALL {', '.join(args.resource_types)} resources in the compartments of {args.csv_file}"
+    if args.plan:
+        print(f"Planning which resources would be stopped in {len(args.profiles)} profiles (nothing will be stopped).")
+    else:
+        print(f"You requested to {action} {target} in {len(args.profiles)} profiles:")
+    for name in args.profiles:
+        print(f"  - {name}")
+    if args.filters:
+        print(f"Only resources matching: {ResourceFilter(args.filters).describe()}")
+    if not args.plan and not args.yes:
+        confirm = input("Are you sure? (y/N): ")
+        if confirm.lower() != "y":
+            print("Operation cancelled.")
+            sys.exit(0)
+
+    print(f"\n##### Running {len(shards)} shards in {processes} processes #####")
+    outcomes = {}
+    started = time.time()
+    # spawn, not fork: every shard starts from a clean interpreter without the parent's threads or locks.
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {}
+        for name, region_shard in shards:
+            child = shard_args(args, name, region_shard)
+            console_path = f"{action}{shard_suffix(child)}_console_{timestamp_str}.txt"
+            futures[executor.submit(run_shard, child, console_path)] = (name, region_shard, console_path)
+        for future in as_completed(futures):
+            name, region_shard, console_path = futures[future]
+            label = name + (" regions {}/{}".format(*region_shard) if region_shard else "")
+            try:
+                outcome = future.result()
+            except BaseException as e:
+                print(f"  [{label}] failed: {e or type(e).__name__} (output in {console_path})")
                 continue
-            results[(region, compartment_ocid)] = result
-            for s in result["success"]:
-                log_rows.append([
-                    timestamp,
-                    region,
-                    compartment_ocid,
-                    resource_type,
-                    s.get("resource_name", ""),
-                    s.get("resource_id", ""),
-                    "success",
-                    s.get("message", "")
-                ])
-            for f in result["failed"]:
-                log_rows.append([
-                    timestamp,
-                    region,
-                    compartment_ocid,
-                    resource_type,
-                    f.get("resource_name", ""),
-                    f.get("resource_id", ""),
-                    "failed",
-                    f.get("message", "")
-                ])
-    print("\n======= Summary =======")
-    for (region, comp), res in results.items():
-        print(f"\n[Region: {region}] Compartment: {comp}")
-        if res["success"]:
-            print("  Successful:")
-            for s in res["success"]:
-                print(f"    - {s.get('resource_name')} ({s.get('resource_id')})")
-        else:
-            print("  No successful actions.")
-        if res["failed"]:
-            print("  Failed:")
-            for f in res["failed"]:
-                print(f"    - {f.get('resource_name')} ({f.get('resource_id')}): {f.get('message')}")
+            outcomes[(name, region_shard)] = outcome
+            run = outcome["report"]["run"]
+            print(f"  [{label}] done in {run['wall_seconds']:.1f}s: {run['resources_succeeded']} succeeded, "
+                  f"{run['resources_failed']} failed (output in {console_path})")
+
+    finished = [shard for shard in shards if shard in outcomes]
+    if not finished:
+        sys.exit("No shard finished.")
+    report = merge_reports((name, outcomes[(name, region_shard)]["report"]) for name, region_shard in finished)
+    report["run"].update(mode="plan" if args.plan else action, profiles=args.profiles,
+                         shards=len(shards), shards_failed=len(shards) - len(finished),
+                         started=datetime.datetime.utcfromtimestamp(started).isoformat() + "Z",
+                         wall_seconds=round(time.time() - started, 3))
+    run_name = run_label(report["run"].get("resource_types", []))
+    metrics_path = args.metrics or f"{action}_{run_name}_combined_metrics_{timestamp_str}.json"
+    print("\n======= Combined Summary =======")
+    print(f"{len(finished)} of {len(shards)} shards finished in {report['run']['wall_seconds']:.1f}s: "
+          f"{report['run']['resources_succeeded']} resources succeeded, {report['run']['resources_failed']} failed")
+    if args.plan:
+        # Like the logs, the shard plans are merged: into one plan per profile when the name has "{profile}",
+        # else into one combined plan with a profile column that --apply filters on.
+        per_profile = "{profile}" in (args.plan_file or "")
+        sinks = {}
+        for name, region_shard in finished:
+            if per_profile:
+                path, fields = args.plan_file.replace("{profile}", name), PLAN_FIELDS
+            else:
+                path = args.plan_file or f"stop_{run_name}_combined_plan_{timestamp_str}.csv"
+                fields = ["profile"] + PLAN_FIELDS
+            if path not in sinks:
+                sinks[path] = LogSink(path, fields=fields)
+            for row in read_log_rows(outcomes[(name, region_shard)]["plan"]):
+                sinks[path].write(row if per_profile else dict(row, profile=name))
+        for path, sink in sinks.items():
+            sink.close()
+            print(f"Plan written to {path} ({sink.rows_written} resources)")
+        plan_name = args.plan_file if per_profile else path
+        print(f'Review it, then run with --apply "{plan_name}" --profile {",".join(args.profiles)}')
+    else:
+        log_path = f"{action}_{run_name}_combined_log_{timestamp_str}.{args.log_format}"
+        combined = LogSink(log_path, fields=["profile"] + LOG_FIELDS, log_format=args.log_format)
+        for name, region_shard in finished:
+            for row in read_log_rows(outcomes[(name, region_shard)]["log"]):
+                combined.write(dict(row, profile=name))
+        combined.close()
+        print(f"Combined log written to {log_path} ({combined.rows_written} rows)")
+    with open(metrics_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Combined call metrics written to {metrics_path}")
+    if args.prometheus:
+        with open(args.prometheus, "w") as f:
+            f.write(CallMetrics().prometheus(report))
+        print(f"Prometheus metrics written to {args.prometheus}")
+
+# -------- Daemon Mode --------
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# at: local "HH:MM" the entry runs at, or None for an entry that only runs when triggered.
+# days: weekday names (DAY_NAMES) the entry runs on. argv: the command line of the run.
+ScheduleEntry = collections.namedtuple("ScheduleEntry", ["name", "at", "days", "argv"])
+
+def parse_run_argv(argv, profile_name):
+    """
+    Parses the command line of one run of a daemon working against profile_name; raises ValueError
+    instead of exiting. Runs without --profile use the daemon's profile; any other profile is refused.
+    """
+    if not any(arg == "--profile" or arg.startswith("--profile=") for arg in argv):
+        argv = list(argv) + ["--profile", profile_name]
+    try:
+        args = parse_args(argv)
+    except SystemExit:
+        raise ValueError(f"invalid arguments: {' '.join(argv)}")
+    if args.daemon or args.trigger or args.send:
+        raise ValueError("a daemon run cannot use --daemon, --trigger or --send")
+    if is_sharded(args):
+        raise ValueError("a daemon run cannot be sharded; run one daemon per profile")
+    if args.profiles and args.profile != profile_name:
+        raise ValueError(f"this daemon runs against profile {profile_name}, not {args.profile}")
+    args.profile = profile_name
+    return args
+
+def load_schedule(path, profile_name):
+    """
+    Reads a daemon schedule file: {"schedules": [{"name", "at", "days", "args"}, ...]} (JSON).
+    Every entry's args are validated up front so mistakes show when the daemon starts, not at 20:00.
+    Returns {name: ScheduleEntry}.
+    """
+    with open(path) as schedulefile:
+        items = json.load(schedulefile).get("schedules", [])
+    entries = {}
+    for i, item in enumerate(items, 1):
+        name = item.get("name") or f"entry{i}"
+        try:
+            at = item.get("at")
+            if at is not None:
+                datetime.datetime.strptime(at, "%H:%M")
+            days = tuple(day.lower()[:3] for day in item.get("days", DAY_NAMES))
+            if not set(days) <= set(DAY_NAMES):
+                raise ValueError(f"days must be among {', '.join(DAY_NAMES)}")
+            argv = [str(arg) for arg in item["args"]]
+            parse_run_argv(argv, profile_name)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"{path}: schedule entry '{name}': {e}")
+        entries[name] = ScheduleEntry(name, at, days, argv)
+    return entries
+
+def next_run_time(entry, after):
+    """Returns the first local time after `after` at which a scheduled entry is due, or None if it is trigger-only."""
+    if entry.at is None:
+        return None
+    hour, minute = map(int, entry.at.split(":"))
+    for offset in range(8):
+        candidate = datetime.datetime.combine(after.date() + datetime.timedelta(days=offset),
+                                              datetime.time(hour, minute))
+        if candidate > after and DAY_NAMES[candidate.weekday()] in entry.days:
+            return candidate
+    return None
+
+def default_socket_path(args):
+    return args.socket or os.path.join(args.cache_dir, f"{args.profile}.sock")
+
+class TriggerServer:
+    """
+    Accepts on-demand run requests on a local Unix socket and queues them for the daemon.
+    Each connection sends one JSON line, {"run": "<entry>"} or {"args": [...], "cwd": "..."},
+    and gets one JSON line back. The socket is only accessible to the daemon's user.
+    """
+
+    def __init__(self, path, entries, requests, profile_name):
+        self.path = path
+        self.profile_name = profile_name
+        self.entries = entries
+        self.requests = requests
+        if os.path.exists(path):
+            os.unlink(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(path)
+        os.chmod(path, 0o600)
+        self._socket.listen()
+        self._thread = threading.Thread(target=self._serve, name="trigger-server", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    request = json.loads(conn.makefile().readline())
+                    reply = self._handle(request)
+                except Exception as e:
+                    reply = {"error": str(e)}
+                conn.sendall((json.dumps(reply) + "\n").encode())
+
+    def _handle(self, request):
+        if "run" in request:
+            entry = self.entries.get(request["run"])
+            if entry is None:
+                return {"error": f"no schedule entry named '{request['run']}'"}
+            self.requests.put((f"trigger:{entry.name}", entry.argv, None))
         else:
-            print("  No failed actions.")
-    write_log_csv(log_file_path, log_rows)
-    print(f"\nLog written to {log_file_path}")
+            argv = [str(arg) for arg in request["args"]]
+            parse_run_argv(argv, self.profile_name)
+            self.requests.put(("trigger:command line", argv, request.get("cwd")))
+        return {"queued": True, "ahead": self.requests.qsize() - 1}
+
+    def close(self):
+        self._socket.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def send_to_daemon(path, request):
+    """Sends one request to the daemon's trigger socket and returns its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        conn.sendall((json.dumps(request) + "\n").encode())
+        return json.loads(conn.makefile().readline())
+
+def run_daemon(args):
+    """
+    Runs schedule entries at their times and triggered runs as they arrive, one at a time, all on one
+    warm Session. Runs until interrupted (Ctrl-C or SIGTERM).
+    """
+    entries = load_schedule(args.daemon, args.profile)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit("Daemon stopping (SIGTERM)."))
+    session = Session(args)
+    with session.identity_client() as identity:
+        regions = session.cache.regions(identity)
+        session.cache.compartment_children(identity)
+    print(f"Daemon started with {len(entries)} schedule entries; {len(regions)} subscribed regions cached.")
+    requests = queue.Queue()
+    server = TriggerServer(default_socket_path(args), entries, requests, args.profile)
+    print(f"Listening for triggers on {server.path}")
+    now = datetime.datetime.now()
+    due = {name: next_run_time(entry, now) for name, entry in entries.items()}
+    for name, when in due.items():
+        if when is not None:
+            print(f"  {name}: next run {when:%Y-%m-%d %H:%M}")
+    try:
+        while True:
+            upcoming = [when for when in due.values() if when is not None]
+            timeout = max(0.0, (min(upcoming) - datetime.datetime.now()).total_seconds()) if upcoming else None
+            try:
+                source, argv, cwd = requests.get(timeout=timeout)
+            except queue.Empty:
+                now = datetime.datetime.now()
+                for name, when in due.items():
+                    if when is not None and when <= now:
+                        requests.put((f"schedule:{name}", entries[name].argv, None))
+                        due[name] = next_run_time(entries[name], now)
+                continue
+            started = datetime.datetime.now()
+            print(f"\n######## [{started:%Y-%m-%d %H:%M:%S}] Run ({source}): {' '.join(argv)} ########")
+            home = os.getcwd()
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                run_stop(parse_run_argv(argv, session.profile), session)
+            except Exception as e:
+                print(f"Run ({source}) failed: {e}")
+            finally:
+                os.chdir(home)
+    except KeyboardInterrupt:
+        print("\nDaemon stopping.")
+    finally:
+        server.close()
+        session.close()
+
+def main(argv=None):
+    """Runs the command line: one stop run, a sharded run, the daemon, or a trigger sent to a running daemon."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
+    if args.daemon:
+        run_daemon(args)
+    elif args.trigger or args.send:
+        request = {"run": args.trigger} if args.trigger else {
+            "args": [arg for arg in argv if arg != "--send"], "cwd": os.getcwd()}
+        try:
+            reply = send_to_daemon(default_socket_path(args), request)
+        except OSError as e:
+            sys.exit(f"Could not reach the daemon at {default_socket_path(args)}: {e}")
+        if "error" in reply:
+            sys.exit(f"Daemon refused the run: {reply['error']}")
+        print(f"Queued; {reply['ahead']} run(s) ahead of it.")
+    elif is_sharded(args):
+        run_sharded(args)
+    else:
+        run_stop(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+End-to-end throughput benchmark: runs Allinoneint03.main() against the in-process fake
+control plane in benchmarks/fake_control_plane.py and reports resources stopped per second,
+wall time and API call counts.
+
+Usage:
+  python benchmarks/bench_run.py [--scale small|medium|large] [options] [-- main() options]
+
+Anything after `--` is passed to main(), e.g. `-- --max-workers 32 --discovery search`.
+With --restart, a second run starts everything again with --start <log of the first run>.
+The large scale is 30 regions x 500 compartments x 10k resources.
+"""
+import argparse
+import builtins
+import contextlib
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Allinoneint03
+from fake_control_plane import FakeControlPlane, install
+
+SCALES = {
+    "small": (3, 50, 1000),
+    "medium": (10, 200, 5000),
+    "large": (30, 500, 10000),
+}
+
+# Options of the stop run that --start does not take (each followed by its value).
+DISCOVERY_OPTIONS = ("--discovery", "--filter", "--filter-file")
+
+def parse_args(argv):
+    if "--" in argv:
+        split = argv.index("--")
+        argv, main_args = argv[:split], argv[split + 1:]
+    else:
+        main_args = []
+    parser = argparse.ArgumentParser(description="Benchmarks Allinoneint03.main() against a fake OCI control plane.")
+    parser.add_argument("--scale", choices=SCALES, default="small",
+                        help="regions x compartments x resources preset (default: small = 3 x 50 x 1000)")
+    parser.add_argument("--regions", type=int, help="override the preset's region count")
+    parser.add_argument("--compartments", type=int, help="override the preset's compartment count")
+    parser.add_argument("--resources", type=int, help="override the preset's resource count")
+    parser.add_argument("--types", default="compute", help="resource types to run (default: compute)")
+    parser.add_argument("--page-size", type=int, default=100, help="items per list page (default: 100)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="mean read call latency (default: 20)")
+    parser.add_argument("--action-latency-ms", type=float, default=50, help="mean stop call latency (default: 50)")
+    parser.add_argument("--throttle-limit", type=float,
+                        help="calls per second one operation accepts per region before answering 429 (default: none)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="share of all calls answered 429 at random (default: 0)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of stops answered 409 (default: 0)")
+    parser.add_argument("--stop-delay", type=float, default=0.0,
+                        help="seconds a resource stays STOPPING, for --wait runs (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the synthetic tenancy (default: 0)")
+    parser.add_argument("--restart", action="store_true",
+                        help="after the stop run, start the stopped resources again with --start and time that too")
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    parser.add_argument("--show-output", action="store_true", help="print main()'s console output")
+    args = parser.parse_args(argv)
+    args.main_args = main_args
+    return args
+
+def run(args):
+    """Runs main() once against a fresh fake tenancy and returns the report dict."""
+    regions, compartments, resources = SCALES[args.scale]
+    resource_types = Allinoneint03.parse_resource_types(args.types)
+    plane = FakeControlPlane(
+        Allinoneint03.RESOURCE_TYPES, resource_types,
+        regions=args.regions or regions, compartments=args.compartments or compartments,
+        resources=args.resources if args.resources is not None else resources, page_size=args.page_size,
+        latency=args.latency_ms / 1000, action_latency=args.action_latency_ms / 1000,
+        throttle_limit=args.throttle_limit, throttle_rate=args.throttle_rate, failure_rate=args.failure_rate,
+        stop_delay=args.stop_delay, seed=args.seed)
+    restore = install(plane, Allinoneint03)
+    cwd = os.getcwd()
+    saved_input = builtins.input
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            os.chdir(workdir)
+            builtins.input = lambda prompt="": "y"
+            with open("compartments.csv", "w") as f:
+                f.write("\n".join(plane.compartments) + "\n")
+            argv = [args.types, "compartments.csv", "--cache-dir", os.path.join(workdir, "cache")] + args.main_args
+            with contextlib.ExitStack() as stack:
+                if not args.show_output:
+                    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+                started = time.perf_counter()
+                Allinoneint03.main(argv)
+                wall = time.perf_counter() - started
+                if args.restart:
+                    log_path = glob.glob("stop_*_log_*")[0]
+                    restart_argv = ["--start", log_path, "--cache-dir", os.path.join(workdir, "cache")]
+                    main_args = iter(args.main_args)
+                    for arg in main_args:
+                        if arg in DISCOVERY_OPTIONS:
+                            next(main_args, None)
+                        elif arg != "--prune":
+                            restart_argv.append(arg)
+                    started = time.perf_counter()
+                    Allinoneint03.main(restart_argv)
+                    restart_wall = time.perf_counter() - started
+        finally:
+            builtins.input = saved_input
+            os.chdir(cwd)
+            restore()
+    report = plane.report()
+    report.update({
+        "scale": {"regions": len(plane.regions), "compartments": len(plane.compartments),
+                  "resources": args.resources if args.resources is not None else resources,
+                  "types": resource_types},
+        "main_args": args.main_args,
+        "wall_seconds": round(wall, 3),
+        "stopped_per_second": round(report["stopped"] / wall, 1) if wall else 0.0,
+        "calls_per_second": round(report["total_calls"] / wall, 1) if wall else 0.0,
+    })
+    if args.restart:
+        report.update({"restart_wall_seconds": round(restart_wall, 3),
+                       "started_per_second": round(report["started"] / restart_wall, 1) if restart_wall else 0.0})
+    return report
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    report = run(args)
+    scale = report["scale"]
+    print(f"Scale: {scale['regions']} regions x {scale['compartments']} compartments x "
+          f"{scale['resources']} resources ({', '.join(scale['types'])})")
+    print(f"Wall time: {report['wall_seconds']:.2f}s")
+    print(f"Stopped: {report['stopped']} ({report['stopped_per_second']:.1f}/s), "
+          f"injected failures: {report['injected_failures']}, throttled: {report['throttled']}")
+    if "restart_wall_seconds" in report:
+        print(f"Restart: {report['started']} started in {report['restart_wall_seconds']:.2f}s "
+              f"({report['started_per_second']:.1f}/s)")
+    print(f"API calls: {report['total_calls']} ({report['calls_per_second']:.1f}/s)")
+    for operation, count in sorted(report["calls"].items(), key=lambda item: -item[1]):
+        print(f"  {operation:<32} {count}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
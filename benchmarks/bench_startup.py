@@ -0,0 +1,58 @@
+"""
+Startup benchmark for Allinoneint03.py.
+
+Runs each scenario in fresh interpreters and reports wall time and peak RSS:
+  eager  - `import oci` with every service module loaded up front (the SDK's
+           behaviour before lazy loading, or with OCI_PYTHON_SDK_LAZY_IMPORTS_DISABLED=true)
+  script - importing Allinoneint03, which loads only the SDK core
+  usage  - a usage error (`Allinoneint03.py bogus x`), the cost of a mistyped cron line
+  client - importing Allinoneint03 and resolving the compute client class, i.e. what one
+           resource type pulls in on demand
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet prints "<seconds> <peak rss kB>" for the measured work.
+PRELUDE = "import resource, sys, time\nstart = time.perf_counter()\n"
+REPORT = "\nprint(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+
+SCENARIOS = {
+    "eager": ("import oci", {"OCI_PYTHON_SDK_LAZY_IMPORTS_DISABLED": "true",
+                             "OCI_PYTHON_SDK_NO_SERVICE_IMPORTS": "0"}),
+    "script": ("import Allinoneint03", {}),
+    "usage": ("import Allinoneint03\ntry:\n    Allinoneint03.parse_args(['bogus', 'x'])\nexcept SystemExit:\n    pass",
+              {}),
+    "client": ("import Allinoneint03\nAllinoneint03.get_client_class('compute')", {}),
+}
+
+def run_once(code, env_overrides):
+    """Runs one scenario in a new interpreter; returns (seconds, peak RSS in MB)."""
+    env = dict(os.environ)
+    for key in ("OCI_PYTHON_SDK_LAZY_IMPORTS_DISABLED", "OCI_PYTHON_SDK_NO_SERVICE_IMPORTS"):
+        env.pop(key, None)
+    env.update(env_overrides)
+    out = subprocess.run([sys.executable, "-c", PRELUDE + code + REPORT], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    seconds, rss_kb = out.split()[-2:]
+    return float(seconds), int(rss_kb) / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario (default: 5)")
+    args = parser.parse_args()
+    print(f"{'scenario':<8} {'median s':>9} {'min s':>7} {'peak RSS MB':>12}")
+    for name, (code, env) in SCENARIOS.items():
+        samples = [run_once(code, env) for _ in range(args.runs)]
+        times = [s for s, _ in samples]
+        print(f"{name:<8} {statistics.median(times):>9.3f} {min(times):>7.3f} "
+              f"{max(rss for _, rss in samples):>12.1f}")
+
+if __name__ == "__main__":
+    main()
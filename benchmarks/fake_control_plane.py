@@ -0,0 +1,296 @@
+"""
+In-process fake of the OCI control plane used by Allinoneint03.py, for benchmarks.
+
+FakeControlPlane holds a synthetic tenancy (regions, compartments and resources of the
+registered types) and serves the calls the script makes: list_region_subscriptions,
+list_compartments, the paginated list_* calls, instance_action / stop_* / deactivate_*,
+start_* / activate_* for --start, the get_* calls used by --wait, Resource Search and get_work_request.
+Every call sleeps for a configurable latency, may be throttled (429) and stop calls may
+fail (409), so client-side concurrency, rate limiting and retries behave as against OCI.
+
+install(plane, module) swaps the script's SDK lookups (oci_service, config, signer) for the
+fake; the script itself runs unchanged.
+"""
+import collections
+import datetime
+import random
+import re
+import threading
+import time
+import types
+
+import oci
+
+# Stopped resources move STOPPING -> STOPPED after stop_delay seconds; started ones STARTING -> RUNNING.
+RUNNING, STOPPING, STOPPED, STARTING = "RUNNING", "STOPPING", "STOPPED", "STARTING"
+SHAPES = ("VM.Standard.E4.Flex", "VM.Standard3.Flex", "VM.Standard2.1", "BM.Standard3.64")
+
+class Response:
+    """Mimics oci.response.Response: data, headers and next_page."""
+
+    def __init__(self, data, next_page=None, headers=None):
+        self.data = data
+        self.next_page = next_page
+        self.headers = headers or {}
+
+class FakeControlPlane:
+    """
+    A synthetic tenancy of `resources` resources spread at random over
+    regions x compartments x resource_types.
+    latency / action_latency are mean seconds per read / mutating call (uniformly jittered +-50%).
+    throttle_limit is the calls per second one operation accepts in one region before answering 429
+    (like OCI's per-API limits); throttle_rate additionally answers that share of all calls with 429.
+    failure_rate is the share of stop calls answered with 409.
+    Resources get a random shape, creation time within the last 60 days and an Env freeform tag;
+    one in ten is tagged DoNotStop, so --filter runs can be benchmarked too.
+    """
+
+    def __init__(self, registry, resource_types, regions=3, compartments=50, resources=1000, page_size=100,
+                 latency=0.02, action_latency=0.05, throttle_limit=None, throttle_rate=0.0, failure_rate=0.0, stop_delay=0.0,
+                 seed=0):
+        self.registry = registry
+        self.regions = [f"fake-region-{i}" for i in range(regions)]
+        self.compartments = [f"ocid1.compartment.oc1..fake{i:05d}" for i in range(compartments)]
+        self.tenancy_id = "ocid1.tenancy.oc1..fake"
+        self.page_size = page_size
+        self.latency = latency
+        self.action_latency = action_latency
+        self.throttle_limit = throttle_limit
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.stop_delay = stop_delay
+        self.calls = collections.Counter()
+        self.throttled = 0
+        self.failed = 0
+        self.stopped = 0
+        self.started = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # (region, operation) -> [current one-second window, calls in it]
+        self._windows = {}
+        # (region, compartment, client class name) -> {ocid: resource}
+        self._resources = collections.defaultdict(dict)
+        self._by_id = {}
+        for i in range(resources):
+            resource_type = self._random.choice(resource_types)
+            region = self._random.choice(self.regions)
+            compartment = self._random.choice(self.compartments)
+            ocid = f"ocid1.{resource_type}.oc1.{region}.fake{i:07d}"
+            tags = {"Env": self._random.choice(("dev", "test", "prod"))}
+            if self._random.random() < 0.1:
+                tags["DoNotStop"] = "true"
+            created = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+                days=self._random.uniform(0, 60))
+            resource = types.SimpleNamespace(id=ocid, display_name=f"{resource_type}-{i}", name=f"{resource_type}-{i}",
+                                             compartment_id=compartment, lifecycle_state=RUNNING, stopped_at=None,
+                                             shape=self._random.choice(SHAPES), freeform_tags=tags, defined_tags={},
+                                             time_created=created)
+            self._resources[(region, compartment, self.client_name(resource_type))][ocid] = resource
+            self._by_id[ocid] = resource
+        self._search_types = {entry.search[0]: name for name, entry in registry.items() if entry.search}
+
+    def client_name(self, resource_type):
+        """The SDK client class name registered for resource_type."""
+        return self.registry[resource_type].client.split(".")[1]
+
+    def _call(self, operation, region, mutating=False):
+        """Counts, delays and possibly throttles one API call."""
+        with self._lock:
+            self.calls[operation] += 1
+            throttle = self._random.random() < self.throttle_rate
+            if self.throttle_limit:
+                window = self._windows.setdefault((region, operation), [0, 0])
+                second = int(time.monotonic())
+                if window[0] != second:
+                    window[:] = [second, 0]
+                window[1] += 1
+                throttle = throttle or window[1] > self.throttle_limit
+            fail = mutating and self._random.random() < self.failure_rate
+            delay = (self.action_latency if mutating else self.latency) * (0.5 + self._random.random())
+        time.sleep(delay)
+        if throttle:
+            with self._lock:
+                self.throttled += 1
+            raise oci.exceptions.ServiceError(429, "TooManyRequests", {}, f"{operation} throttled in {region}")
+        if fail:
+            with self._lock:
+                self.failed += 1
+            raise oci.exceptions.ServiceError(409, "IncorrectState", {}, "Injected failure")
+
+    def _page(self, items, page):
+        """
+        Returns the RUNNING items of one page and the token of the next page.
+        Pages are cut from the unfiltered list so stops made between pages do not shift later pages.
+        """
+        start = int(page or 0)
+        end = start + self.page_size
+        with self._lock:
+            running = [item for item in items[start:end] if self._state(self._by_id[item.id]) == RUNNING]
+        return Response(running, str(end) if end < len(items) else None)
+
+    def _state(self, resource):
+        if resource.lifecycle_state in (STOPPING, STARTING) and \
+                time.monotonic() - resource.stopped_at >= self.stop_delay:
+            resource.lifecycle_state = STOPPED if resource.lifecycle_state == STOPPING else RUNNING
+        return resource.lifecycle_state
+
+    # ---- identity ----
+    def list_region_subscriptions(self, region, tenancy_id):
+        self._call("list_region_subscriptions", region)
+        return Response([types.SimpleNamespace(region_name=r) for r in self.regions])
+
+    def list_compartments(self, region, compartment_id, page=None, **kwargs):
+        self._call("list_compartments", region)
+        start = int(page or 0)
+        end = start + self.page_size
+        created = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        children = [types.SimpleNamespace(id=c, compartment_id=self.tenancy_id,
+                                          time_created=created + datetime.timedelta(hours=i))
+                    for i, c in enumerate(self.compartments)]
+        if kwargs.get("sort_by") == "TIMECREATED" and kwargs.get("sort_order") == "DESC":
+            children.reverse()
+        return Response(children[start:end], str(end) if end < len(children) else None)
+
+    # ---- generic resource calls ----
+    def list(self, operation, region, client_name, compartment_id, page=None, display_name=None, name=None,
+             **kwargs):
+        self._call(operation, region)
+        exact = display_name or name
+        with self._lock:
+            resources = [r for r in self._resources[(region, compartment_id, client_name)].values()
+                         if exact is None or r.display_name == exact]
+        return self._page(resources, page)
+
+    def stop(self, operation, region, resource_id):
+        self._call(operation, region, mutating=True)
+        with self._lock:
+            resource = self._by_id.get(resource_id)
+            if resource is None:
+                raise oci.exceptions.ServiceError(404, "NotAuthorizedOrNotFound", {}, "Resource not found")
+            if resource.lifecycle_state == RUNNING:
+                resource.lifecycle_state = STOPPING
+                resource.stopped_at = time.monotonic()
+                self.stopped += 1
+        return Response(None, headers={"opc-work-request-id": f"ocid1.workrequest.oc1..{resource_id}"})
+
+    def start(self, operation, region, resource_id):
+        self._call(operation, region, mutating=True)
+        with self._lock:
+            resource = self._by_id.get(resource_id)
+            if resource is None:
+                raise oci.exceptions.ServiceError(404, "NotAuthorizedOrNotFound", {}, "Resource not found")
+            if self._state(resource) == STOPPED:
+                resource.lifecycle_state = STARTING
+                resource.stopped_at = time.monotonic()
+                self.started += 1
+        return Response(None, headers={"opc-work-request-id": f"ocid1.workrequest.oc1..{resource_id}"})
+
+    def get(self, operation, region, resource_id):
+        self._call(operation, region)
+        with self._lock:
+            resource = self._by_id.get(resource_id)
+            if resource is None:
+                raise oci.exceptions.ServiceError(404, "NotAuthorizedOrNotFound", {}, "Resource not found")
+            return Response(types.SimpleNamespace(id=resource.id, lifecycle_state=self._state(resource)))
+
+    def get_work_request(self, region, work_request_id):
+        self._call("get_work_request", region)
+        with self._lock:
+            resource = self._by_id.get(work_request_id.rsplit("..", 1)[-1])
+            done = resource is not None and self._state(resource) not in (STOPPING, STARTING)
+        return Response(types.SimpleNamespace(id=work_request_id, status="SUCCEEDED" if done else "IN_PROGRESS"))
+
+    # ---- Resource Search ----
+    def search_resources(self, region, search_details, page=None, **kwargs):
+        self._call("search_resources", region)
+        search_type = search_details.query.split()[1]
+        client_name = self.client_name(self._search_types[search_type])
+        compartments = re.findall(r"compartmentId = '([^']+)'", search_details.query)
+        with self._lock:
+            matches = [r for c in compartments for r in self._resources[(region, c, client_name)].values()]
+        response = self._page(matches, page)
+        response.data = [types.SimpleNamespace(identifier=r.id, display_name=r.display_name,
+                                               compartment_id=r.compartment_id, freeform_tags=r.freeform_tags,
+                                               defined_tags=r.defined_tags, time_created=r.time_created)
+                         for r in response.data]
+        return response
+
+    def report(self):
+        """Returns the API call counts and injected outcomes."""
+        return {"calls": dict(self.calls), "total_calls": sum(self.calls.values()),
+                "throttled": self.throttled, "injected_failures": self.failed, "stopped": self.stopped,
+                "started": self.started}
+
+class FakeClient:
+    """
+    Stands in for any SDK client class. Methods are resolved by name: list_* lists, get_* reads one
+    resource, instance_action / stop_* / deactivate_* stop it and start_* / activate_* start it again;
+    everything is served by the plane.
+    """
+    plane = None
+
+    def __init__(self, config, **kwargs):
+        self.region = config["region"]
+        self.base_client = types.SimpleNamespace(session=types.SimpleNamespace(close=lambda: None))
+
+    def list_region_subscriptions(self, tenancy_id, **kwargs):
+        return self.plane.list_region_subscriptions(self.region, tenancy_id)
+
+    def list_compartments(self, compartment_id, **kwargs):
+        return self.plane.list_compartments(self.region, compartment_id, **kwargs)
+
+    def search_resources(self, search_details, **kwargs):
+        return self.plane.search_resources(self.region, search_details, **kwargs)
+
+    def get_work_request(self, work_request_id, **kwargs):
+        return self.plane.get_work_request(self.region, work_request_id)
+
+    def instance_action(self, instance_id, action, **kwargs):
+        if action == "START":
+            return self.plane.start("instance_action", self.region, instance_id)
+        return self.plane.stop("instance_action", self.region, instance_id)
+
+    def __getattr__(self, operation):
+        plane, region, client_name = self.plane, self.region, type(self).__name__
+        if operation.startswith("list_"):
+            return lambda compartment_id, **kwargs: plane.list(operation, region, client_name, compartment_id,
+                                                                **kwargs)
+        if operation.startswith("get_"):
+            return lambda resource_id, **kwargs: plane.get(operation, region, resource_id)
+        if operation.startswith(("stop_", "deactivate_")):
+            return lambda resource_id, *args, **kwargs: plane.stop(operation, region, resource_id)
+        if operation.startswith(("start_", "activate_")):
+            return lambda resource_id, *args, **kwargs: plane.start(operation, region, resource_id)
+        raise AttributeError(operation)
+
+def fake_service(plane, name):
+    """Builds a stand-in for the SDK module oci.<name> whose client classes are bound to the plane."""
+    clients = {entry.client.split(".")[1] for entry in plane.registry.values() if entry.client.split(".")[0] == name}
+    clients.update({"identity": {"IdentityClient"}, "resource_search": {"ResourceSearchClient"}}.get(name, ()))
+    service = types.SimpleNamespace(models=types.SimpleNamespace(
+        StopDbSystemDetails=types.SimpleNamespace, StopBdsInstanceDetails=types.SimpleNamespace,
+        StartBdsInstanceDetails=types.SimpleNamespace,
+        StructuredSearchDetails=types.SimpleNamespace))
+    for client_name in clients:
+        setattr(service, client_name, type(client_name, (FakeClient,), {"plane": plane}))
+    return service
+
+def install(plane, module):
+    """Points the script module at the fake plane; returns a callable that restores it."""
+    services = {}
+    lock = threading.Lock()
+
+    def oci_service(name):
+        with lock:
+            if name not in services:
+                services[name] = fake_service(plane, name)
+            return services[name]
+
+    saved = (module.oci_service, module.build_signer, oci.config.from_file)
+    module.oci_service = oci_service
+    module.build_signer = lambda config: None
+    oci.config.from_file = lambda *args, **kwargs: {"tenancy": plane.tenancy_id, "region": plane.regions[0]}
+
+    def restore():
+        module.oci_service, module.build_signer, oci.config.from_file = saved
+    return restore